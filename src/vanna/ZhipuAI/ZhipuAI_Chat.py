@@ -5,6 +5,7 @@ import pandas as pd
 from zhipuai import ZhipuAI
 
 from ..base import VannaBase
+from ..exceptions import DependencyError
 
 
 class ZhipuAI_Chat(VannaBase):
@@ -231,3 +232,71 @@ class ZhipuAI_Chat(VannaBase):
         )
 
         return response.choices[0].message.content
+
+    def submit_prompt_stream(
+        self, prompt, max_tokens=500, temperature=0.7, top_p=0.7, stop=None, **kwargs
+    ):
+        if prompt is None:
+            raise Exception("Prompt is None")
+
+        if len(prompt) == 0:
+            raise Exception("Prompt is empty")
+
+        client = ZhipuAI(api_key=self.api_key)
+        response = client.chat.completions.create(
+            model="glm-4",
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            stop=stop,
+            messages=prompt,
+            stream=True,
+        )
+
+        try:
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the response stops the generation when the caller stops reading early
+            close = getattr(response, "close", None)
+            if close is not None:
+                close()
+
+    async def asubmit_prompt(
+        self, prompt, max_tokens=500, temperature=0.7, top_p=0.7, stop=None, **kwargs
+    ):
+        if prompt is None:
+            raise Exception("Prompt is None")
+
+        if len(prompt) == 0:
+            raise Exception("Prompt is empty")
+
+        try:
+            import httpx
+        except ImportError:
+            raise DependencyError(
+                "You need to install required dependencies to execute this method, run command:"
+                " \npip install httpx"
+            )
+
+        data = {
+            "model": "glm-4",
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": top_p,
+            "messages": prompt,
+        }
+        if stop is not None:
+            data["stop"] = stop
+
+        # The ZhipuAI SDK has no asyncio client, so call the OpenAI-compatible HTTP API directly
+        async with httpx.AsyncClient(timeout=None) as client:
+            response = await client.post(
+                self.api_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json=data,
+            )
+        response.raise_for_status()
+
+        return response.json()["choices"][0]["message"]["content"]
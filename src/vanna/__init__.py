@@ -1,12 +1,15 @@
+from __future__ import annotations
+
 import dataclasses
 import json
 import os
 from dataclasses import dataclass
-from typing import Callable, List, Tuple, Union
+from typing import TYPE_CHECKING, Callable, List, Tuple, Union
 
-import pandas as pd
-import requests
-import plotly.graph_objs
+if TYPE_CHECKING:
+    # Only used in annotations, importing them would slow down `import vanna`
+    import pandas as pd
+    import plotly.graph_objs
 
 from .exceptions import (
     OTPCodeError,
@@ -56,6 +59,8 @@ vn = VannaDefault(model=vanna_model_name, api_key=api_key)
 """)
 
 def __unauthenticated_rpc_call(method, params):
+    import requests
+
     headers = {
         "Content-Type": "application/json",
     }
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+import warnings
+from typing import List, Union
+
+from ..utils import LazyModule
+
+pd = LazyModule("pandas")
+
+# Columns with more distinct values than this are not used to color lines
+_MAX_COLORS = 10
+
+
+def _column_kind(series: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(series):
+        return "categorical"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+    if pd.api.types.is_numeric_dtype(series):
+        return "numeric"
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return "categorical"
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return "other"
+
+    sample = series.dropna().head(100)
+    if len(sample) == 0:
+        return "other"
+    if not all(isinstance(value, str) for value in sample):
+        return "other"
+
+    # Dates that come back from the database as strings, e.g. from SQLite
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        parsed = pd.to_datetime(sample, format="ISO8601", errors="coerce")
+    if parsed.notna().all() and sample.str.contains(r"\d{4}-\d{2}", regex=True).all():
+        return "datetime"
+
+    return "categorical"
+
+
+def profile_dataframe(df: pd.DataFrame) -> dict:
+    """
+    Describe the shape of a dataframe for choosing a chart: the number of `rows` and, for each column, its `name`,
+    `kind` (datetime, numeric, categorical or other) and number of `distinct` values.
+    """
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        kind = _column_kind(series)
+        try:
+            distinct = int(series.nunique())
+        except TypeError:
+            kind, distinct = "other", None
+        columns.append({"name": name, "kind": kind, "distinct": distinct})
+
+    return {"rows": len(df), "columns": columns}
+
+
+def plan_chart(df: pd.DataFrame, title: Union[str, None] = None) -> Union[str, None]:
+    """
+    Write the Plotly code for a dataframe with a common shape, or return None if the chart is better left to the
+    LLM:
+
+    - a single number becomes an indicator
+    - a datetime column with numbers becomes a line chart, one line per category if there is a category column
+    - a category column with one number per category becomes a bar chart
+    - two number columns become a scatter plot
+    - a single number column becomes a histogram
+    """
+    profile = profile_dataframe(df)
+    rows = profile["rows"]
+    columns = profile["columns"]
+    if rows == 0 or any(column["kind"] == "other" for column in columns):
+        return None
+
+    def names(kind: str) -> List:
+        return [column["name"] for column in columns if column["kind"] == kind]
+
+    def distinct(name) -> int:
+        return next(column["distinct"] for column in columns if column["name"] == name)
+
+    datetimes, numbers, categories = names("datetime"), names("numeric"), names("categorical")
+    title_argument = f", title={title!r}" if title else ""
+
+    if rows == 1 and len(numbers) == 1:
+        return (
+            f"fig = go.Figure(go.Indicator(mode='number', value=df[{numbers[0]!r}].iloc[0], "
+            f"title={{'text': {(title or str(numbers[0]))!r}}}))"
+        )
+
+    if len(datetimes) == 1 and numbers and not categories:
+        y = numbers[0] if len(numbers) == 1 else numbers
+        return f"fig = px.line(df.sort_values({datetimes[0]!r}), x={datetimes[0]!r}, y={y!r}{title_argument})"
+
+    if len(datetimes) == 1 and len(numbers) == 1 and len(categories) == 1 and distinct(categories[0]) <= _MAX_COLORS:
+        return (
+            f"fig = px.line(df.sort_values({datetimes[0]!r}), x={datetimes[0]!r}, y={numbers[0]!r}, "
+            f"color={categories[0]!r}{title_argument})"
+        )
+
+    if datetimes:
+        return None
+
+    if len(categories) == 1 and len(numbers) == 1 and distinct(categories[0]) == rows:
+        return f"fig = px.bar(df, x={categories[0]!r}, y={numbers[0]!r}{title_argument})"
+
+    if not categories and len(numbers) == 2:
+        return f"fig = px.scatter(df, x={numbers[0]!r}, y={numbers[1]!r}{title_argument})"
+
+    if not categories and len(numbers) == 1:
+        return f"fig = px.histogram(df, x={numbers[0]!r}{title_argument})"
+
+    return None
+
+
+class ChartPlanner:
+    """
+    Chooses the chart for results with a common shape without asking the LLM, see
+    [`plan_chart`][vanna.base.chart_planner.plan_chart], and counts how often it did.
+
+    **Example:**
+    ```python
+    planner = ChartPlanner()
+    vn = MyVanna(config={"chart_planner": planner})
+    ...
+    print(planner.planned, planner.deferred, planner.skip_rate)
+    ```
+    """
+
+    def __init__(self):
+        self.planned = 0
+        self.deferred = 0
+        self._lock = threading.Lock()
+
+    @property
+    def skip_rate(self) -> float:
+        """
+        The share of charts that didn't need the LLM.
+        """
+        total = self.planned + self.deferred
+        return self.planned / total if total else 0.0
+
+    def plan(self, df: pd.DataFrame, title: Union[str, None] = None) -> Union[str, None]:
+        """
+        Get the Plotly code for the dataframe, or None if the LLM should write it.
+        """
+        plotly_code = plan_chart(df, title=title)
+        with self._lock:
+            if plotly_code is None:
+                self.deferred += 1
+            else:
+                self.planned += 1
+
+        return plotly_code
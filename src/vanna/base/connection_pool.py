@@ -0,0 +1,106 @@
+import threading
+from collections import deque
+from typing import Any, Callable, Union
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of database connections used by the pooled mode of the `vn.connect_to_...` helpers.
+
+    At most `max_size` connections are checked out at once; further callers block until one is released.
+    Idle connections are checked with `is_healthy` before they are handed out and replaced if the check fails.
+
+    Args:
+        connect (Callable[[], Any]): Opens a new connection.
+        min_size (int): The number of connections opened up front.
+        max_size (int): The maximum number of connections open at once.
+        is_healthy (Callable[[Any], bool]): Checks an idle connection before reuse. Defaults to no check.
+        close (Callable[[Any], None]): Closes a connection. Defaults to calling `connection.close()`.
+        timeout (float): Seconds to wait for a free connection before raising TimeoutError. Defaults to waiting forever.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        is_healthy: Union[Callable[[Any], bool], None] = None,
+        close: Union[Callable[[Any], None], None] = None,
+        timeout: Union[float, None] = None,
+    ):
+        if min_size > max_size:
+            raise ValueError("min_size cannot be larger than max_size")
+
+        self._connect = connect
+        self._is_healthy = is_healthy
+        self._close = close or (lambda connection: connection.close())
+        self.timeout = timeout
+        self.max_size = max_size
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+        for _ in range(min_size):
+            self._idle.append(connect())
+
+    def acquire(self):
+        """
+        Check a connection out of the pool, opening a new one if none is idle.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No database connection became available within {self.timeout} seconds")
+
+        try:
+            while True:
+                with self._lock:
+                    connection = self._idle.popleft() if self._idle else None
+
+                if connection is None:
+                    return self._connect()
+
+                if self._check(connection):
+                    return connection
+
+                self._discard(connection)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, discard: bool = False):
+        """
+        Return a connection to the pool. Pass discard=True for a connection that is known to be broken.
+        """
+        try:
+            if discard:
+                self._discard(connection)
+            else:
+                with self._lock:
+                    self._idle.append(connection)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """
+        Close every idle connection.
+        """
+        with self._lock:
+            connections = list(self._idle)
+            self._idle.clear()
+
+        for connection in connections:
+            self._discard(connection)
+
+    def _check(self, connection) -> bool:
+        if self._is_healthy is None:
+            return True
+
+        try:
+            return bool(self._is_healthy(connection))
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        try:
+            self._close(connection)
+        except Exception:
+            pass
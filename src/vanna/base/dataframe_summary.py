@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from typing import Callable, List, Union
+
+from ..utils import LazyModule
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+# Longer values are cut in the summary, e.g. free text or JSON columns
+_MAX_VALUE_CHARS = 80
+# The rows considered for the sample, of which as many as fit in the budget are shown
+_MAX_SAMPLE_ROWS = 200
+# Leading rows come first in the sample since results are often sorted by what the question asks for
+_HEAD_ROWS = 5
+
+
+def _approx_token_count(string: str) -> int:
+    return len(string) // 4
+
+
+def _short(value) -> str:
+    text = str(value)
+    return text if len(text) <= _MAX_VALUE_CHARS else text[:_MAX_VALUE_CHARS - 3] + "..."
+
+
+def _describe_column(series: pd.Series, top_k: int) -> dict:
+    try:
+        distinct = int(series.nunique())
+    except TypeError:
+        distinct = None
+
+    column = {
+        "column": _short(series.name),
+        "dtype": str(series.dtype),
+        "distinct": distinct if distinct is not None else "?",
+        "nulls": int(series.isna().sum()),
+    }
+
+    values = series.dropna()
+    if len(values) == 0:
+        column["values"] = ""
+    elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        column["values"] = f"min {values.min():.6g}, mean {values.mean():.6g}, max {values.max():.6g}"
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        column["values"] = f"{values.min()} to {values.max()}"
+    elif distinct is None:
+        column["values"] = ", ".join(_short(value) for value in values.head(top_k))
+    else:
+        counts = values.value_counts().head(top_k)
+        column["values"] = ", ".join(f"{_short(value)} ({count})" for value, count in counts.items())
+        if distinct > top_k:
+            column["values"] += ", ..."
+
+    return column
+
+
+def _strata_column(df: pd.DataFrame, columns: List[dict], top_k: int) -> Union[str, None]:
+    # The first text column with a few repeated values, e.g. a region or a status
+    for name, column in zip(df.columns, columns):
+        if (
+            isinstance(column["distinct"], int)
+            and 1 < column["distinct"] <= top_k * 4
+            and column["distinct"] < len(df)
+            and not pd.api.types.is_numeric_dtype(df[name])
+        ):
+            return name
+    return None
+
+
+def _sample_positions(df: pd.DataFrame, strata: Union[str, None]) -> np.ndarray:
+    head = np.arange(min(_HEAD_ROWS, len(df)))
+
+    if strata is None:
+        # Evenly spaced rows cover the whole range of sorted results
+        spread = np.linspace(0, len(df) - 1, min(_MAX_SAMPLE_ROWS, len(df))).astype(np.int64)
+    else:
+        # Take evenly spaced rows from each group in turn, so every group is represented however small
+        groups = [
+            positions[np.linspace(0, len(positions) - 1, min(len(positions), _MAX_SAMPLE_ROWS)).astype(np.int64)]
+            for positions in df.groupby(strata, sort=False, dropna=False).indices.values()
+        ]
+        spread = [group[i] for i in range(_MAX_SAMPLE_ROWS) for group in groups if i < len(group)]
+
+    _, first = np.unique(np.concatenate([head, np.asarray(spread, dtype=np.int64)]), return_index=True)
+    ordered = np.concatenate([head, np.asarray(spread, dtype=np.int64)])[np.sort(first)]
+    return ordered[:_MAX_SAMPLE_ROWS]
+
+
+def _fit(render: Callable[[int], str], count_tokens: Callable[[str], int], budget: int, n: int) -> int:
+    # The largest number of items whose rendering fits in the budget
+    low, high = 0, n
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(render(middle)) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def summarize_dataframe(
+    df: pd.DataFrame,
+    max_tokens: int = 2000,
+    count_tokens: Callable[[str], int] = _approx_token_count,
+    top_k: int = 5,
+) -> str:
+    """
+    Describe a dataframe for a prompt in at most `max_tokens` tokens. Dataframes that fit are shown in full.
+    Larger ones are described by their row count, the dtype, distinct values, nulls and the top values or range of
+    each column, and a sample of rows: the first rows, then rows spread evenly over the dataframe, or over each
+    group of its first low-cardinality text column.
+
+    Args:
+        df (pd.DataFrame): The dataframe to describe.
+        max_tokens (int): The number of tokens the description may use.
+        count_tokens (Callable[[str], int]): Counts the tokens of a string.
+        top_k (int): The number of most frequent values shown for each text column.
+
+    Returns:
+        str: The description, in markdown.
+    """
+    # Every cell takes at least a token, so only small dataframes are rendered to see if they fit
+    if len(df) * max(len(df.columns), 1) <= max_tokens:
+        full = df.to_markdown()
+        if count_tokens(full) <= max_tokens:
+            return full
+
+    columns = [_describe_column(df.iloc[:, i].rename(name), top_k) for i, name in enumerate(df.columns)]
+
+    def render_columns(n: int) -> str:
+        text = f"The DataFrame has {len(df)} rows and {len(df.columns)} columns.\n\n"
+        text += pd.DataFrame(columns[:n]).to_markdown(index=False)
+        if n < len(columns):
+            text += f"\n\n{len(columns) - n} more columns are not shown."
+        return text
+
+    # The columns get up to half of the budget and the sample the rest
+    n_columns = _fit(render_columns, count_tokens, max_tokens // 2, len(columns))
+    overview = render_columns(n_columns)
+
+    strata = _strata_column(df, columns, top_k)
+    positions = _sample_positions(df, strata)
+    how = f"spread over each {_short(strata)}" if strata is not None else "spread over the rows"
+
+    def render_sample(n: int) -> str:
+        # The rows are picked in order of priority and shown in their order in the dataframe
+        shown = df.iloc[np.sort(positions[:n])].copy()
+        for name in shown.columns:
+            if pd.api.types.is_object_dtype(shown[name]) or pd.api.types.is_string_dtype(shown[name]):
+                shown[name] = shown[name].map(lambda value: _short(value) if isinstance(value, str) else value)
+        return f"\n\nA sample of {n} rows, the first rows then rows {how}:\n{shown.to_markdown()}"
+
+    remaining = max_tokens - count_tokens(overview)
+    n_rows = _fit(render_sample, count_tokens, remaining, len(positions))
+    return overview + (render_sample(n_rows) if n_rows else "")
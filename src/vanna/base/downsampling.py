@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import ast
+import math
+from typing import List, Tuple, Union
+
+from ..utils import LazyModule
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+_PX_KINDS = {"line": "line", "area": "line", "scatter": "scatter", "bar": "bar", "pie": "pie"}
+_GO_KINDS = {"Scatter": "scatter", "Scattergl": "scatter", "Bar": "bar", "Pie": "pie"}
+# The positional arguments of the plotly.express functions after the data frame
+_PX_POSITIONAL = {"pie": ["names", "values"]}
+
+
+def _column_name(node: ast.AST) -> Union[str, List[str], None]:
+    # "col", ["a", "b"], df["col"] and df.col all name columns of the data frame
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, (ast.List, ast.Tuple)):
+        names = [_column_name(element) for element in node.elts]
+        return names if names and all(isinstance(name, str) for name in names) else None
+    if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == "df":
+        return _column_name(node.slice)
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "df":
+        return node.attr
+    return None
+
+
+def detect_chart(plotly_code: str) -> Union[dict, None]:
+    """
+    Find the first plotly.express or graph_objects chart the Plotly code draws from `df`. Returns the `kind` of
+    chart (line, scatter, bar or pie) and the columns used as `x`, `y`, `names`, `values` and `color`, or None if
+    the code doesn't draw a chart this module can downsample.
+    """
+    try:
+        tree = ast.parse(plotly_code or "")
+    except SyntaxError:
+        return None
+
+    for node in ast.walk(tree):
+        if not (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and isinstance(node.func.value, ast.Name)
+        ):
+            continue
+
+        module, function = node.func.value.id, node.func.attr
+        if module == "px" and function in _PX_KINDS:
+            kind = _PX_KINDS[function]
+            positional = _PX_POSITIONAL.get(kind, ["x", "y"])
+            arguments = dict(zip(positional, node.args[1:]))
+        elif module == "go" and function in _GO_KINDS:
+            kind = _GO_KINDS[function]
+            arguments = {}
+        else:
+            continue
+
+        arguments.update({keyword.arg: keyword.value for keyword in node.keywords if keyword.arg})
+        if module == "go":
+            if kind == "scatter":
+                mode = arguments.get("mode")
+                mode = mode.value if isinstance(mode, ast.Constant) else "lines"
+                kind = "scatter" if "lines" not in mode else "line"
+            if "labels" in arguments:
+                arguments["names"] = arguments.pop("labels")
+
+        chart = {"kind": kind}
+        for name in ("x", "y", "names", "values", "color"):
+            chart[name] = _column_name(arguments[name]) if name in arguments else None
+        return chart
+
+    return None
+
+
+def _as_numbers(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype("int64").to_numpy(dtype=float)
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=float)
+    # Categories are spaced evenly in the order they first appear
+    return pd.factorize(series)[0].astype(float)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Select `n` points of a line with the Largest-Triangle-Three-Buckets algorithm, which keeps the points that
+    shape the line, such as its peaks and troughs. The first and last points are always kept.
+    """
+    length = len(x)
+    if n >= length:
+        return np.arange(length)
+    if n < 3:
+        return np.array([0, length - 1])[:max(n, 0)]
+
+    indices = np.empty(n, dtype=np.int64)
+    indices[0], indices[-1] = 0, length - 1
+    # n - 2 buckets between the first and the last point
+    edges = np.linspace(1, length - 1, n - 1).astype(np.int64)
+
+    selected = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < n - 1 else length
+        next_x = np.nanmean(x[end:next_end])
+        next_y = np.nanmean(y[end:next_end])
+
+        # The point of the bucket that forms the largest triangle with the last selected point and the mean of the
+        # next bucket
+        area = np.abs(
+            (x[selected] - next_x) * (y[start:end] - y[selected]) - (x[selected] - x[start:end]) * (next_y - y[selected])
+        )
+        selected = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        indices[i + 1] = selected
+
+    return indices
+
+
+def bin_indices(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Split the plane into a grid of about `n` cells and keep the first point in each cell, so the shape of a scatter
+    plot and its outliers survive while dense areas are thinned out.
+    """
+    bins = max(int(math.sqrt(n)), 1)
+
+    def bin_of(values):
+        low, high = np.nanmin(values), np.nanmax(values)
+        scaled = (values - low) / (high - low) * bins if high > low else np.zeros(len(values))
+        # Missing values get a bin of their own
+        return np.nan_to_num(scaled, nan=bins).clip(0, bins).astype(np.int64)
+
+    cells = bin_of(x) * (bins + 1) + bin_of(y)
+    _, first = np.unique(cells, return_index=True)
+    return np.sort(first)
+
+
+def top_n_with_other(
+    df: pd.DataFrame, names: str, values: str, n: int, other: str = "Other", color: Union[str, None] = None
+) -> pd.DataFrame:
+    """
+    Keep the rows of the `n - 1` categories with the largest total `values` and add up the rest in a row per color
+    with the category `other`.
+    """
+    totals = df.groupby(names, sort=False, dropna=False)[values].sum()
+    if len(totals) <= n:
+        return df
+
+    top = totals.nlargest(n - 1).index
+    keep = df[names].isin(top)
+    rest = df[~keep]
+
+    keys = [color] if color is not None else []
+    if keys:
+        grouped = rest.groupby(keys, sort=False, dropna=False)[values].sum().reset_index()
+    else:
+        grouped = pd.DataFrame({values: [rest[values].sum()]})
+    grouped[names] = other
+
+    return pd.concat([df[keep], grouped], ignore_index=True)
+
+
+def downsample_for_chart(
+    plotly_code: str, df: pd.DataFrame, max_points: int = 5000, max_categories: int = 20
+) -> Tuple[pd.DataFrame, Union[dict, None]]:
+    """
+    Reduce a dataframe to what the chart drawn by the Plotly code can show: line charts keep `max_points` points
+    picked with LTTB, scatter plots keep one point per cell of a grid of `max_points` cells, and bar and pie charts
+    keep the `max_categories - 1` largest categories and an "Other" category.
+
+    Returns:
+        Tuple[pd.DataFrame, Union[dict, None]]: The dataframe to chart and, if it was downsampled, the `method`, the
+        number of `rows` before and the number of rows after as `points`.
+    """
+    if len(df) <= min(max_points, max_categories):
+        return df, None
+
+    chart = detect_chart(plotly_code)
+    if chart is None:
+        return df, None
+
+    def column(name):
+        return name if isinstance(name, str) and name in df.columns else None
+
+    kind = chart["kind"]
+    color = column(chart["color"])
+
+    if kind in ("bar", "pie"):
+        names = column(chart["x"] if kind == "bar" else chart["names"])
+        values = column(chart["y"] if kind == "bar" else chart["values"])
+        if names is None or values is None or not pd.api.types.is_numeric_dtype(df[values]):
+            return df, None
+
+        result = top_n_with_other(df, names, values, max_categories, color=color)
+        method = "top_n"
+    else:
+        if len(df) <= max_points:
+            return df, None
+
+        x = column(chart["x"])
+        y_names = chart["y"] if isinstance(chart["y"], list) else [chart["y"]]
+        y_columns = [column(name) for name in y_names if column(name) is not None]
+        if not y_columns:
+            return df, None
+
+        x_values = _as_numbers(df[x]) if x is not None else np.arange(len(df), dtype=float)
+        groups = df.groupby(color, sort=False, dropna=False).indices.values() if color else [np.arange(len(df))]
+        budget = max(max_points // (len(y_columns) * len(groups)), 3)
+
+        # Each line keeps its share of the budget
+        selected = []
+        for rows in groups:
+            if kind == "line":
+                # LTTB follows the line along x, and results are often not sorted by it
+                rows = rows[np.argsort(x_values[rows], kind="stable")]
+            for y in y_columns:
+                y_values = _as_numbers(df[y])[rows]
+                select = lttb_indices if kind == "line" else bin_indices
+                selected.append(rows[select(x_values[rows], y_values, budget)])
+
+        result = df.iloc[np.unique(np.concatenate(selected))]
+        method = "lttb" if kind == "line" else "binning"
+
+    if len(result) == len(df):
+        return df, None
+
+    return result, {"method": method, "rows": len(df), "points": len(result)}
@@ -0,0 +1,275 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from typing import List, Union
+
+
+def embedding_model_id(model) -> str:
+    """
+    Describe an embedding model for the keys of an [`EmbeddingCache`][vanna.base.embedding_cache.EmbeddingCache].
+    Names are used as they are, and model objects are described by their class and, if they have one, the name of
+    the model they load.
+    """
+    if model is None or isinstance(model, str):
+        return model or ""
+
+    name = next(
+        (
+            value
+            for value in (getattr(model, attribute, None) for attribute in ("model_name", "model_name_or_path", "name"))
+            if isinstance(value, str)
+        ),
+        "",
+    )
+    return f"{type(model).__module__}.{type(model).__qualname__}:{name}"
+
+
+class EmbeddingCache(ABC):
+    """
+    Define the interface for a cache of embeddings that can be shared by every vector store.
+
+    **Example:**
+    ```python
+    vn = MyVanna(config={"embedding_cache": MemoryEmbeddingCache(max_size=50000)})
+    ```
+
+    Any `generate_embedding` implementation picks up the cache from the `embedding_cache` config key.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(data: str, model: str) -> str:
+        """
+        Generate the cache key for a piece of text embedded with a given model.
+        """
+        return hashlib.sha256(f"{model}\0{data}".encode("utf-8")).hexdigest()
+
+    @abstractmethod
+    def get(self, key: str) -> Union[List[float], None]:
+        """
+        Get an embedding from the cache. Returns None if the key is not cached.
+        """
+        pass
+
+    @abstractmethod
+    def set(self, key: str, embedding: List[float]):
+        """
+        Set an embedding in the cache.
+        """
+        pass
+
+    @abstractmethod
+    def clear(self):
+        """
+        Remove all embeddings from the cache.
+        """
+        pass
+
+
+class MemoryEmbeddingCache(EmbeddingCache):
+    """
+    An in-process LRU cache holding at most `max_size` embeddings.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        super().__init__()
+        self.max_size = max_size
+        self.cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Union[List[float], None]:
+        with self._lock:
+            embedding = self.cache.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def set(self, key: str, embedding: List[float]):
+        with self._lock:
+            self.cache[key] = embedding
+            self.cache.move_to_end(key)
+
+            while len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.cache.clear()
+
+    def __len__(self):
+        return len(self.cache)
+
+
+class SQLiteEmbeddingCache(EmbeddingCache):
+    """
+    An LRU cache of `max_size` embeddings in front of a SQLite file, so embeddings survive restarts
+    and can be shared by several processes on the same host.
+
+    The least recently used embeddings are evicted from the file once it holds more than `max_rows`
+    embeddings or more than `max_bytes` of embedding data. Set either to None for no limit.
+    """
+
+    def __init__(
+        self,
+        path: str = "embedding_cache.sqlite",
+        max_size: int = 10000,
+        max_rows: Union[int, None] = 1000000,
+        max_bytes: Union[int, None] = 1024 * 1024 * 1024,
+    ):
+        super().__init__()
+        self.path = path
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.memory = MemoryEmbeddingCache(max_size=max_size)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+        # Processes opening the file at the same time must not count the totals while the other adds triggers
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                embedding BLOB NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0,
+                accessed_at REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+        # Files written before the limits existed have neither column
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(embeddings)")]
+        if "size" not in columns:
+            self.conn.execute("ALTER TABLE embeddings ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            self.conn.execute("UPDATE embeddings SET size = LENGTH(embedding)")
+        if "accessed_at" not in columns:
+            self.conn.execute("ALTER TABLE embeddings ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed_at ON embeddings (accessed_at)")
+
+        # Triggers keep the totals of every process in the file, so the limits are checked without a scan
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings_totals (n_rows INTEGER NOT NULL, n_bytes INTEGER NOT NULL)"
+        )
+        self.conn.execute(
+            """
+            INSERT INTO embeddings_totals SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings
+            WHERE NOT EXISTS (SELECT 1 FROM embeddings_totals)
+            """
+        )
+        for trigger in (
+            "embeddings_insert AFTER INSERT ON embeddings BEGIN"
+            " UPDATE embeddings_totals SET n_rows = n_rows + 1, n_bytes = n_bytes + NEW.size; END",
+            "embeddings_delete AFTER DELETE ON embeddings BEGIN"
+            " UPDATE embeddings_totals SET n_rows = n_rows - 1, n_bytes = n_bytes - OLD.size; END",
+            "embeddings_update AFTER UPDATE OF size ON embeddings BEGIN"
+            " UPDATE embeddings_totals SET n_bytes = n_bytes + NEW.size - OLD.size; END",
+        ):
+            self.conn.execute(f"CREATE TRIGGER IF NOT EXISTS {trigger}")
+        self.conn.commit()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # A connection must not be shared with processes forked after it was opened, e.g. by gunicorn --preload
+        if self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._pid = os.getpid()
+
+        return self._conn
+
+    def get(self, key: str) -> Union[List[float], None]:
+        embedding = self.memory.get(key)
+        if embedding is not None:
+            self.hits += 1
+            return embedding
+
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT embedding FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE embeddings SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                )
+                self.conn.commit()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        embedding = array("d")
+        embedding.frombytes(row[0])
+        embedding = embedding.tolist()
+
+        self.memory.set(key, embedding)
+        self.hits += 1
+        return embedding
+
+    def set(self, key: str, embedding: List[float]):
+        self.memory.set(key, embedding)
+        data = array("d", embedding).tobytes()
+
+        with self._lock:
+            try:
+                # An upsert rather than INSERT OR REPLACE, whose deletes do not fire the triggers
+                self.conn.execute(
+                    """
+                    INSERT INTO embeddings (key, embedding, size, accessed_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (key) DO UPDATE SET
+                        embedding = excluded.embedding, size = excluded.size, accessed_at = excluded.accessed_at
+                    """,
+                    (key, data, len(data), time.time()),
+                )
+                self._evict()
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+
+    def _evict(self):
+        if self.max_rows is None and self.max_bytes is None:
+            return
+
+        n_rows, n_bytes = self.conn.execute("SELECT n_rows, n_bytes FROM embeddings_totals").fetchone()
+        if (self.max_rows is None or n_rows <= self.max_rows) and (
+            self.max_bytes is None or n_bytes <= self.max_bytes
+        ):
+            return
+
+        evicted = []
+        for key, size in self.conn.execute("SELECT key, size FROM embeddings ORDER BY accessed_at"):
+            if (self.max_rows is None or n_rows <= self.max_rows) and (
+                self.max_bytes is None or n_bytes <= self.max_bytes
+            ):
+                break
+
+            evicted.append((key,))
+            n_rows -= 1
+            n_bytes -= size
+
+        self.conn.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+
+    def clear(self):
+        self.memory.clear()
+
+        with self._lock:
+            self.conn.execute("DELETE FROM embeddings")
+            self.conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT n_rows FROM embeddings_totals").fetchone()[0]
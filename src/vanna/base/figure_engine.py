@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import math
+import queue
+import threading
+from collections import OrderedDict
+from typing import Union
+
+from ..exceptions import ExecutionError
+from ..utils import LazyModule
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+plotly = LazyModule("plotly")
+px = LazyModule("plotly.express")
+go = LazyModule("plotly.graph_objects")
+
+
+@functools.lru_cache(maxsize=256)
+def compile_plotly_code(plotly_code: str):
+    """
+    Compile Plotly code once, so charts that are drawn again only execute it.
+    """
+    return compile(plotly_code, "<plotly_code>", "exec")
+
+
+def dataframe_fingerprint(df: pd.DataFrame) -> Union[str, None]:
+    """
+    Hash the column names, dtypes, index and values of a dataframe. Returns None for dataframes with values pandas
+    can't hash, such as lists.
+    """
+    digest = hashlib.sha256(repr([(str(name), str(dtype)) for name, dtype in df.dtypes.items()]).encode("utf-8"))
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    except TypeError:
+        return None
+
+    return digest.hexdigest()
+
+
+def fallback_figure(df: pd.DataFrame):
+    """
+    Choose a chart from the dtypes of the dataframe, for when the Plotly code fails.
+    """
+    numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
+    categorical_cols = df.select_dtypes(include=["object", "category"]).columns.tolist()
+
+    # Decision-making for plot type
+    if len(numeric_cols) >= 2:
+        # Use the first two numeric columns for a scatter plot
+        return px.scatter(df, x=numeric_cols[0], y=numeric_cols[1])
+    elif len(numeric_cols) == 1 and len(categorical_cols) >= 1:
+        # Use a bar plot if there's one numeric and one categorical column
+        return px.bar(df, x=categorical_cols[0], y=numeric_cols[0])
+    elif len(categorical_cols) >= 1 and df[categorical_cols[0]].nunique() < 10:
+        # Use a pie chart for categorical data with fewer unique values
+        return px.pie(df, names=categorical_cols[0])
+    else:
+        # Default to a simple line plot if above conditions are not met
+        return px.line(df)
+
+
+def run_plotly_code(plotly_code: str, df: pd.DataFrame, dark_mode: bool = True) -> Union[str, None]:
+    """
+    Run Plotly code that creates a `fig` from `df` and return the figure as JSON, or None if the code doesn't create
+    a figure. Code that fails is replaced by [`fallback_figure`][vanna.base.figure_engine.fallback_figure].
+    """
+    namespace = {"df": df, "pd": pd, "np": np, "plotly": plotly, "px": px, "go": go}
+    try:
+        exec(compile_plotly_code(plotly_code), namespace)
+        fig = namespace.get("fig", None)
+    except Exception:
+        fig = fallback_figure(df)
+
+    if fig is None:
+        return None
+
+    if dark_mode:
+        fig.update_layout(template="plotly_dark")
+
+    return fig.to_json()
+
+
+def _set_cpu_time_limit(cpu_time_limit):
+    import resource
+
+    # RLIMIT_CPU counts the whole life of the process, so each figure gets the time used so far plus the limit
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime) + cpu_time_limit
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, memory_limit, cpu_time_limit):
+    try:
+        import resource
+    except ImportError:
+        # Limits are not available on Windows, only the timeout applies there
+        resource = None
+
+    if resource is not None and memory_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+
+    # A new process imports Plotly before taking work, so the import doesn't count against the timeout of a figure
+    px.scatter
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            plotly_code, df, dark_mode = conn.recv()
+        except EOFError:
+            return
+
+        if resource is not None and cpu_time_limit is not None:
+            _set_cpu_time_limit(cpu_time_limit)
+
+        try:
+            conn.send(("ok", run_plotly_code(plotly_code, df, dark_mode)))
+        except BaseException as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    # The number of seconds a new worker may take to start
+    START_TIMEOUT = 60
+
+    def __init__(self, context, memory_limit, cpu_time_limit):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, memory_limit, cpu_time_limit), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def run(self, task: tuple, timeout: Union[float, None]) -> tuple:
+        if not self.ready:
+            if not self.conn.poll(self.START_TIMEOUT):
+                raise ExecutionError(f"The figure worker did not start within {self.START_TIMEOUT} seconds")
+            try:
+                self.conn.recv()
+            except EOFError:
+                self.process.join(1)
+                raise ExecutionError(f"The figure worker failed to start (exit code {self.process.exitcode})")
+            self.ready = True
+
+        self.conn.send(task)
+        if not self.conn.poll(timeout):
+            raise ExecutionError(f"The Plotly code did not finish within {timeout} seconds")
+
+        try:
+            return self.conn.recv()
+        except EOFError:
+            # The worker was killed, e.g. by SIGXCPU for using more CPU time than allowed
+            self.process.join(1)
+            raise ExecutionError(f"The Plotly code was stopped (exit code {self.process.exitcode})")
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class FigureEngine:
+    """
+    Runs the Plotly code written by the LLM and caches the resulting figures as JSON, keyed by the code and a
+    fingerprint of the dataframe, so drawing the same chart of the same data again is a lookup.
+
+    With `workers` set, the code runs in a pool of worker processes with limited CPU time and memory, and a worker
+    that doesn't finish within `timeout` seconds is killed, so runaway chart code can't stall the process that
+    serves the API. With the default of 0 workers the code runs in the calling thread without limits, as it used to.
+
+    **Example:**
+    ```python
+    vn = MyVanna(config={"figure_engine": FigureEngine(workers=2, timeout=10, memory_limit=2 * 1024**3)})
+    ```
+
+    Args:
+        workers (int): The number of worker processes. 0 runs the code in the calling thread.
+        timeout (float): The number of seconds a figure may take in a worker.
+        cpu_time_limit (int): The number of CPU seconds a figure may use in a worker.
+        memory_limit (int): The number of bytes of address space a worker may use.
+        cache_max_bytes (int): The total size of the cached figure JSON. 0 disables the cache.
+        start_method (str): The multiprocessing start method of the workers. Defaults to "forkserver", or "spawn"
+            where that isn't available. Forking the threaded API process could copy a lock held by another thread
+            into the worker and deadlock it.
+    """
+
+    def __init__(
+        self,
+        workers: int = 0,
+        timeout: Union[float, None] = 30,
+        cpu_time_limit: Union[int, None] = 30,
+        memory_limit: Union[int, None] = 2 * 1024**3,
+        cache_max_bytes: int = 64 * 1024**2,
+        start_method: Union[str, None] = None,
+    ):
+        self.workers = workers
+        self.timeout = timeout
+        self.cpu_time_limit = cpu_time_limit
+        self.memory_limit = memory_limit
+        self.cache_max_bytes = cache_max_bytes
+        self.start_method = start_method
+
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_lock = threading.Lock()
+
+        self._context = None
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(workers, 1))
+
+    def render(self, plotly_code: str, df: pd.DataFrame, dark_mode: bool = True) -> Union[str, None]:
+        """
+        Get the JSON of the figure the Plotly code creates from the dataframe.
+
+        Raises:
+            ExecutionError: If a worker runs out of time or is stopped for exceeding its limits.
+        """
+        # Without code the fallback chart is drawn, which isn't worth caching
+        fingerprint = dataframe_fingerprint(df) if self.cache_max_bytes and plotly_code else None
+        key = None
+        if fingerprint is not None:
+            code_hash = hashlib.sha256(plotly_code.encode("utf-8")).hexdigest()
+            key = f"{code_hash}:{fingerprint}:{int(dark_mode)}"
+            with self._cache_lock:
+                fig_json = self._cache.get(key)
+                if fig_json is not None:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return fig_json
+                self.misses += 1
+
+        if self.workers > 0:
+            fig_json = self._run_in_worker((plotly_code, df, dark_mode))
+        else:
+            fig_json = run_plotly_code(plotly_code, df, dark_mode)
+
+        if key is not None and fig_json is not None and len(fig_json) <= self.cache_max_bytes:
+            with self._cache_lock:
+                if key not in self._cache:
+                    self._cache[key] = fig_json
+                    self._cache_bytes += len(fig_json)
+
+                while self._cache_bytes > self.cache_max_bytes:
+                    _, evicted = self._cache.popitem(last=False)
+                    self._cache_bytes -= len(evicted)
+
+        return fig_json
+
+    def _run_in_worker(self, task: tuple) -> Union[str, None]:
+        with self._slots:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                if self._context is None:
+                    import multiprocessing
+
+                    start_method = self.start_method
+                    if start_method is None:
+                        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                    self._context = multiprocessing.get_context(start_method)
+                worker = _Worker(self._context, self.memory_limit, self.cpu_time_limit)
+
+            try:
+                status, result = worker.run(task, self.timeout)
+            except BaseException:
+                worker.kill()
+                raise
+
+            self._idle.put(worker)
+
+        if status == "error":
+            raise ExecutionError(f"The Plotly code failed: {result}")
+
+        return result
+
+    def clear(self):
+        """
+        Remove all figures from the cache.
+        """
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+
+    def close(self):
+        """
+        Stop the worker processes. They are started again when needed.
+        """
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                return
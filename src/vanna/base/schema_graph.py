@@ -0,0 +1,326 @@
+import re
+from collections import deque
+from typing import Dict, List, Tuple, Union
+
+_IDENTIFIER = r"(?:\"[^\"]+\"|`[^`]+`|\[[^\]]+\]|[\w$]+)"
+_CREATE_TABLE = re.compile(
+    r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:GLOBAL\s+|LOCAL\s+)?(?:TEMP|TEMPORARY)\s+)?(?:EXTERNAL\s+)?TABLE\s+"
+    rf"(?:IF\s+NOT\s+EXISTS\s+)?({_IDENTIFIER}(?:\s*\.\s*{_IDENTIFIER})*)\s*\(",
+    re.IGNORECASE,
+)
+_CONSTRAINT_NAME = re.compile(r"^CONSTRAINT\s+\S+\s+", re.IGNORECASE)
+_PRIMARY_KEY = re.compile(r"^PRIMARY\s+KEY\s*\(([^)]*)\)", re.IGNORECASE)
+_FOREIGN_KEY = re.compile(
+    r"^FOREIGN\s+KEY\s*\(([^)]*)\)\s*REFERENCES\s+([^\s(]+)\s*(?:\(([^)]*)\))?", re.IGNORECASE
+)
+_TABLE_CONSTRAINT = re.compile(r"^(UNIQUE|CHECK|INDEX|KEY|FULLTEXT|SPATIAL|EXCLUDE|PERIOD)\b", re.IGNORECASE)
+_INLINE_REFERENCES = re.compile(r"\bREFERENCES\s+([^\s(]+)\s*(?:\(([^)]*)\))?", re.IGNORECASE)
+_INLINE_PRIMARY_KEY = re.compile(r"\bPRIMARY\s+KEY\b", re.IGNORECASE)
+_LINE_COMMENT = re.compile(r"--[^\n]*")
+
+
+def normalize_identifier(name: str) -> str:
+    """
+    Strip quoting from a possibly qualified identifier and lowercase it.
+    """
+    return ".".join(part.strip().strip('`"[]').lower() for part in name.strip().split("."))
+
+
+def _split_identifiers(names: str) -> List[str]:
+    return [normalize_identifier(name) for name in names.split(",") if name.strip()]
+
+
+def _split_top_level(body: str) -> List[str]:
+    # Split on commas outside of parentheses and quotes, e.g. between "DECIMAL(10, 2)" columns
+    parts, depth, quote, start = [], 0, None, 0
+    for i, char in enumerate(body):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(body[start:i])
+            start = i + 1
+
+    parts.append(body[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _closing_paren(text: str, start: int) -> int:
+    depth, quote = 0, None
+    for i in range(start, len(text)):
+        char = text[i]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+
+    return -1
+
+
+class Column:
+    def __init__(self, name: str, definition: str):
+        self.name = name
+        self.definition = definition
+
+    def __repr__(self):
+        return f"Column({self.name!r})"
+
+
+class ForeignKey:
+    def __init__(self, columns: List[str], ref_table: str, ref_columns: List[str], inline: bool = False):
+        self.columns = columns
+        self.ref_table = ref_table
+        self.ref_columns = ref_columns
+        # Inline REFERENCES clauses are part of the column definition
+        self.inline = inline
+
+    def __repr__(self):
+        return f"ForeignKey({self.columns!r} -> {self.ref_table}{self.ref_columns!r})"
+
+
+class Table:
+    """
+    A table parsed from a CREATE TABLE statement.
+
+    Args:
+        name (str): The table name as written in the DDL.
+        ddl (str): The CREATE TABLE statement.
+    """
+
+    def __init__(self, name: str, ddl: str):
+        self.name = name
+        self.key = normalize_identifier(name)
+        self.ddl = ddl
+        self.columns: List[Column] = []
+        self.primary_key: List[str] = []
+        self.primary_key_inline = False
+        self.foreign_keys: List[ForeignKey] = []
+
+    def __repr__(self):
+        return f"Table({self.name!r}, {len(self.columns)} columns)"
+
+    def column(self, name: str) -> Union[Column, None]:
+        name = normalize_identifier(name)
+        return next((column for column in self.columns if normalize_identifier(column.name) == name), None)
+
+    def render(self, column_names: List[str]) -> str:
+        """
+        Render a CREATE TABLE statement with only the given columns, in their original order, and the foreign keys
+        between them. The number of omitted columns is noted in a comment.
+        """
+        keep = {normalize_identifier(name) for name in column_names}
+        columns = [column for column in self.columns if normalize_identifier(column.name) in keep]
+        if len(columns) == len(self.columns):
+            return self.ddl
+
+        lines = [column.definition for column in columns]
+
+        if self.primary_key and not self.primary_key_inline and all(name in keep for name in self.primary_key):
+            lines.append(f"PRIMARY KEY ({', '.join(self.primary_key)})")
+
+        for foreign_key in self.foreign_keys:
+            if not foreign_key.inline and all(name in keep for name in foreign_key.columns):
+                lines.append(
+                    f"FOREIGN KEY ({', '.join(foreign_key.columns)}) REFERENCES "
+                    f"{foreign_key.ref_table} ({', '.join(foreign_key.ref_columns)})"
+                )
+
+        omitted = len(self.columns) - len(columns)
+        return (
+            f"CREATE TABLE {self.name} (\n  "
+            + ",\n  ".join(lines)
+            + f"\n  -- {omitted} more column{'s' if omitted != 1 else ''} not shown\n)"
+        )
+
+
+def parse_ddl(ddl: str) -> List[Table]:
+    """
+    Parse the CREATE TABLE statements in a piece of DDL into tables with their columns, primary keys and foreign
+    keys. Anything else in the DDL is ignored.
+    """
+    tables = []
+    matches = list(_CREATE_TABLE.finditer(ddl))
+    for match in matches:
+        open_paren = match.end() - 1
+        close_paren = _closing_paren(ddl, open_paren)
+        if close_paren == -1:
+            continue
+
+        # A statement on its own keeps its comments and options, several are split up
+        table_ddl = ddl.strip() if len(matches) == 1 else ddl[match.start():close_paren + 1]
+        table = Table(match.group(1).strip(), table_ddl)
+        body = _LINE_COMMENT.sub("", ddl[open_paren + 1:close_paren])
+
+        for element in _split_top_level(body):
+            element = " ".join(element.split())
+            constraint = _CONSTRAINT_NAME.sub("", element)
+
+            primary_key = _PRIMARY_KEY.match(constraint)
+            if primary_key:
+                table.primary_key += _split_identifiers(primary_key.group(1))
+                continue
+
+            foreign_key = _FOREIGN_KEY.match(constraint)
+            if foreign_key:
+                table.foreign_keys.append(
+                    ForeignKey(
+                        _split_identifiers(foreign_key.group(1)),
+                        foreign_key.group(2),
+                        _split_identifiers(foreign_key.group(3) or ""),
+                    )
+                )
+                continue
+
+            if constraint != element or _TABLE_CONSTRAINT.match(element):
+                continue
+
+            name = element.split()[0]
+            table.columns.append(Column(name.strip('`"[]'), element))
+
+            if _INLINE_PRIMARY_KEY.search(element):
+                table.primary_key.append(normalize_identifier(name))
+                table.primary_key_inline = True
+
+            references = _INLINE_REFERENCES.search(element)
+            if references:
+                table.foreign_keys.append(
+                    ForeignKey(
+                        [normalize_identifier(name)],
+                        references.group(1),
+                        _split_identifiers(references.group(2) or ""),
+                        inline=True,
+                    )
+                )
+
+        tables.append(table)
+
+    return tables
+
+
+class SchemaGraph:
+    """
+    A graph of the tables in the trained DDL, connected by their foreign keys. It is used by
+    [`vn.prune_ddl(...)`][vanna.base.base.VannaBase.prune_ddl] to find the join paths between the tables retrieved
+    for a question, and to keep the column embeddings used for column-level retrieval.
+    """
+
+    def __init__(self, ddl_list: List[str] = ()):
+        self.tables: Dict[str, Table] = {}
+        self._short_names: Dict[str, List[str]] = {}
+        self.column_embeddings: Dict[str, List[float]] = {}
+        self._edges = None
+
+        for ddl in ddl_list:
+            self.add_ddl(ddl)
+
+    def add_ddl(self, ddl: str) -> List[Table]:
+        """
+        Add the tables of a piece of DDL to the graph, replacing tables with the same name.
+        """
+        tables = parse_ddl(ddl)
+        for table in tables:
+            if table.key not in self.tables:
+                self._short_names.setdefault(table.key.split(".")[-1], []).append(table.key)
+            self.tables[table.key] = table
+
+        self._edges = None
+        return tables
+
+    def find_table(self, name: str) -> Union[Table, None]:
+        """
+        Find a table by name. Unqualified names and names qualified differently than in the DDL match if they are
+        unambiguous.
+        """
+        key = normalize_identifier(name)
+        if key in self.tables:
+            return self.tables[key]
+
+        keys = self._short_names.get(key.split(".")[-1], [])
+        return self.tables[keys[0]] if len(keys) == 1 else None
+
+    def edges(self, table: Table) -> List[Tuple[Table, List[str], Table, List[str]]]:
+        """
+        The foreign keys from and to a table, as (table, columns, other table, other columns).
+        """
+        if self._edges is None:
+            self._edges = {}
+            for source in self.tables.values():
+                for foreign_key in source.foreign_keys:
+                    target = self.find_table(foreign_key.ref_table)
+                    if target is None or target is source:
+                        continue
+
+                    ref_columns = foreign_key.ref_columns or target.primary_key
+                    self._edges.setdefault(source.key, []).append((source, foreign_key.columns, target, ref_columns))
+                    self._edges.setdefault(target.key, []).append((target, ref_columns, source, foreign_key.columns))
+
+        return self._edges.get(table.key, [])
+
+    def join_paths(self, tables: List[Table], max_hops: int = 3) -> List[Tuple[Table, List[str], Table, List[str]]]:
+        """
+        Find the foreign keys that connect the given tables, going through at most `max_hops` joins between any
+        two of them. Each table is connected to the tables before it by the shortest path, so the result is a tree
+        that may pass through tables not in the list.
+        """
+        connected = [tables[0]] if tables else []
+        joins = []
+        seen_joins = set()
+
+        for target in tables[1:]:
+            if any(table is target for table in connected):
+                continue
+
+            path = self._shortest_path(connected, target, max_hops)
+            if path is None:
+                connected.append(target)
+                continue
+
+            for edge in path:
+                key = frozenset([(edge[0].key, tuple(edge[1])), (edge[2].key, tuple(edge[3]))])
+                if key not in seen_joins:
+                    seen_joins.add(key)
+                    joins.append(edge)
+                for table in (edge[0], edge[2]):
+                    if not any(known is table for known in connected):
+                        connected.append(table)
+
+        return joins
+
+    def _shortest_path(self, sources: List[Table], target: Table, max_hops: int):
+        previous = {id(target): None}
+        queue = deque([(target, 0)])
+        source_ids = {id(source) for source in sources}
+
+        # Search from the target so the path is found in one pass whichever source it reaches first
+        while queue:
+            table, hops = queue.popleft()
+            if id(table) in source_ids:
+                path = []
+                while previous[id(table)] is not None:
+                    edge = previous[id(table)]
+                    path.append(edge)
+                    table = edge[2]
+                return path
+
+            if hops == max_hops:
+                continue
+
+            for _, columns, other, other_columns in self.edges(table):
+                if id(other) not in previous:
+                    previous[id(other)] = (other, other_columns, table, columns)
+                    queue.append((other, hops + 1))
+
+        return None
@@ -0,0 +1,118 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Union
+
+import numpy as np
+
+
+class SemanticSQLCache:
+    """
+    A cache of generated SQL keyed by question, used by
+    [`vn.generate_sql(...)`][vanna.base.base.VannaBase.generate_sql] to skip the LLM for questions it has already answered.
+
+    A question is a hit if it matches a cached question exactly (ignoring case and whitespace) or if the cosine
+    similarity of their embeddings is at least `similarity_threshold`. Entries expire after `ttl` seconds and the
+    whole cache is cleared whenever DDL or documentation is added or training data is removed.
+
+    **Example:**
+    ```python
+    vn = MyVanna(config={"sql_cache": SemanticSQLCache(similarity_threshold=0.97, ttl=3600)})
+    ```
+
+    Args:
+        similarity_threshold (float): The minimum cosine similarity for a semantic hit. Set to None for exact matches only.
+        ttl (float): The number of seconds an entry stays valid. Set to None to never expire entries.
+        max_size (int): The maximum number of cached questions. The least recently used entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: Union[float, None] = 0.95,
+        ttl: Union[float, None] = 24 * 60 * 60,
+        max_size: int = 1000,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(question: str) -> str:
+        return re.sub(r"\s+", " ", question.strip().lower())
+
+    def _expire(self):
+        if self.ttl is None:
+            return
+
+        cutoff = time.time() - self.ttl
+        for key in [key for key, entry in self.entries.items() if entry["created_at"] < cutoff]:
+            del self.entries[key]
+
+    def get(self, question: str, embedding: Union[List[float], None] = None) -> Union[str, None]:
+        """
+        Get the cached SQL for a question. Returns None on a miss.
+        """
+        key = self._normalize(question)
+
+        with self._lock:
+            self._expire()
+
+            entry = self.entries.get(key)
+
+            if entry is None and embedding is not None and self.similarity_threshold is not None:
+                candidates = [
+                    (candidate_key, candidate)
+                    for candidate_key, candidate in self.entries.items()
+                    if candidate["embedding"] is not None
+                    and len(candidate["embedding"]) == len(embedding)
+                ]
+                if candidates:
+                    query = np.asarray(embedding, dtype=np.float32)
+                    matrix = np.stack([candidate["embedding"] for _, candidate in candidates])
+                    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+                    similarities = matrix @ query / np.where(norms == 0, 1, norms)
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.similarity_threshold:
+                        key, entry = candidates[best]
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry["sql"]
+
+    def set(self, question: str, sql: str, embedding: Union[List[float], None] = None):
+        """
+        Cache the SQL generated for a question.
+        """
+        with self._lock:
+            key = self._normalize(question)
+            self.entries[key] = {
+                "question": question,
+                "sql": sql,
+                "embedding": None if embedding is None else np.asarray(embedding, dtype=np.float32),
+                "created_at": time.time(),
+            }
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self):
+        """
+        Remove every entry, e.g. because the schema context used to generate the SQL has changed.
+        """
+        with self._lock:
+            self.entries.clear()
+            self.invalidations += 1
+
+    def __len__(self):
+        return len(self.entries)
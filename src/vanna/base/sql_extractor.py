@@ -0,0 +1,129 @@
+import re
+from typing import Union
+
+from ..utils import LazyModule
+
+sqlparse = LazyModule("sqlparse")
+
+_FENCE = "```"
+_STATEMENT_START = re.compile(r"\b(SELECT|WITH)\b")
+
+
+def is_complete_statement(sql: str) -> bool:
+    """
+    Check that a piece of SQL is a single statement that sqlparse recognizes and that is terminated by a `;`
+    outside of any string, identifier, comment or parentheses.
+    """
+    T = sqlparse.tokens
+    statements = [statement for statement in sqlparse.parse(sql) if str(statement).strip()]
+    if len(statements) != 1 or statements[0].get_type() == "UNKNOWN":
+        return False
+
+    depth = 0
+    last = None
+    for token in statements[0].flatten():
+        # sqlparse reports unterminated quotes as errors
+        if token.ttype in T.Error:
+            return False
+        if token.is_whitespace or token.ttype in T.Comment:
+            continue
+        if token.match(T.Punctuation, "("):
+            depth += 1
+        elif token.match(T.Punctuation, ")"):
+            depth -= 1
+        last = token
+
+    # An unterminated block comment is tokenized as operators
+    if sql.count("/*") > sql.count("*/"):
+        return False
+
+    return depth == 0 and last is not None and last.match(T.Punctuation, ";")
+
+
+class IncrementalSQLExtractor:
+    """
+    Finds the SQL statement in an LLM response while it is streamed, so the generation can be stopped as soon as the
+    statement is complete instead of waiting for the explanation the LLM adds after it.
+
+    Feed it the chunks of the response as they arrive. A statement is complete at the closing ``` of a code block,
+    or at a `;` that ends a statement [`is_complete_statement`][vanna.base.sql_extractor.is_complete_statement]
+    accepts, either in a code block or, outside of one, after an uppercase SELECT or WITH.
+
+    **Example:**
+    ```python
+    extractor = IncrementalSQLExtractor()
+    for chunk in vn.submit_prompt_stream(prompt):
+        if extractor.feed(chunk):
+            break
+    print(extractor.sql)
+    ```
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.sql: Union[str, None] = None
+        # The end of the complete statement (or code block) in the text
+        self.end: Union[int, None] = None
+        self._scanned = 0
+        self._prose_start = 0
+        self._fence_start = None
+
+    @property
+    def complete(self) -> bool:
+        return self.sql is not None
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Add the next chunk of the response. Returns True once a complete statement has been seen.
+        """
+        if self.sql is not None:
+            return True
+
+        self.text += chunk
+        text = self.text
+        i = self._scanned
+
+        # Only the new text is scanned, the candidate statements are parsed when a ; arrives
+        while i < len(text):
+            if text[i] == "`":
+                if len(text) - i < len(_FENCE):
+                    break
+
+                if text.startswith(_FENCE, i):
+                    if self._fence_start is None:
+                        # The code block starts after the language tag on the opening line
+                        newline = text.find("\n", i)
+                        if newline == -1:
+                            break
+                        self._fence_start = newline + 1
+                        i = newline + 1
+                        continue
+
+                    sql = text[self._fence_start:i].strip()
+                    if sql:
+                        return self._finish(sql, i + len(_FENCE))
+
+                    self._fence_start = None
+                    self._prose_start = i + len(_FENCE)
+                    i += len(_FENCE)
+                    continue
+
+            elif text[i] == ";":
+                start = self._fence_start
+                if start is None:
+                    match = _STATEMENT_START.search(text, self._prose_start, i)
+                    start = match.start() if match else None
+
+                if start is not None and is_complete_statement(text[start:i + 1]):
+                    return self._finish(text[start:i + 1].strip(), i + 1)
+
+            i += 1
+
+        self._scanned = i
+        return False
+
+    def _finish(self, sql: str, end: int) -> bool:
+        self.sql = sql
+        self.end = end
+        self._scanned = end
+        return True
@@ -0,0 +1,106 @@
+import functools
+from abc import ABC, abstractmethod
+
+from ..exceptions import DependencyError
+
+
+class Tokenizer(ABC):
+    """
+    Define the interface for counting the tokens in a piece of text, which is used to fit retrieved context into the
+    prompt budget.
+
+    **Example:**
+    ```python
+    vn = MyVanna(config={"tokenizer": TiktokenTokenizer(model="gpt-4o")})
+    ```
+    """
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """
+        Count the tokens in a piece of text.
+        """
+        pass
+
+
+class ApproxTokenizer(Tokenizer):
+    """
+    Approximates the token count as one token per `chars_per_token` characters. This is the default.
+    """
+
+    def __init__(self, chars_per_token: float = 4):
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> float:
+        return len(text) / self.chars_per_token
+
+
+class _CachedTokenizer(Tokenizer):
+    # Retrieved DDL and documentation repeat from one question to the next, so the counts are memoized
+    def __init__(self, cache_size: int):
+        self._count = functools.lru_cache(maxsize=cache_size)(self._encode_length)
+
+    @abstractmethod
+    def _encode_length(self, text: str) -> int:
+        pass
+
+    def count(self, text: str) -> int:
+        return self._count(text)
+
+
+class TiktokenTokenizer(_CachedTokenizer):
+    """
+    Counts tokens with [tiktoken](https://github.com/openai/tiktoken), the tokenizer used by OpenAI models.
+
+    Args:
+        model (str): The model whose encoding to use. Unknown models fall back to `encoding`.
+        encoding (str): The encoding to use when no model is given.
+        cache_size (int): The number of texts whose counts are memoized.
+    """
+
+    def __init__(self, model: str = None, encoding: str = "cl100k_base", cache_size: int = 4096):
+        try:
+            import tiktoken
+        except ImportError:
+            raise DependencyError(
+                "You need to install required dependencies to execute this method,"
+                " run command: \npip install tiktoken"
+            )
+
+        super().__init__(cache_size)
+
+        try:
+            self.encoding = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding(encoding)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding(encoding)
+
+    def _encode_length(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+class HuggingFaceTokenizer(_CachedTokenizer):
+    """
+    Counts tokens with a Hugging Face tokenizer, e.g. the one of the model served by Ollama or vLLM.
+
+    Args:
+        tokenizer (str | PreTrainedTokenizerBase): A tokenizer, or the name of a model to load one for with `AutoTokenizer`.
+        cache_size (int): The number of texts whose counts are memoized.
+    """
+
+    def __init__(self, tokenizer, cache_size: int = 4096):
+        if isinstance(tokenizer, str):
+            try:
+                from transformers import AutoTokenizer
+            except ImportError:
+                raise DependencyError(
+                    "You need to install required dependencies to execute this method,"
+                    " run command: \npip install vanna[hf]"
+                )
+
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer)
+
+        super().__init__(cache_size)
+        self.tokenizer = tokenizer
+
+    def _encode_length(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
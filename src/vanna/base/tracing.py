@@ -0,0 +1,245 @@
+import bisect
+import threading
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from typing import Dict, Iterator, List
+
+from ..exceptions import DependencyError
+
+
+class Span:
+    """
+    A timed stage of the pipeline, e.g. `submit_prompt` or `run_sql`. Stages add what they measured, such as token,
+    row or byte counts, with `set`.
+    """
+
+    __slots__ = ("name", "attributes", "start", "duration", "error")
+
+    # Stages skip measuring their attributes for spans that aren't recorded
+    recording = True
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.duration = None
+        self.error = None
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    recording = False
+
+    def set(self, key: str, value):
+        pass
+
+
+# Returned for every stage when tracing is off, so a disabled tracer costs one config lookup per stage
+NOOP_SPAN = nullcontext(_NoopSpan())
+
+
+class Tracer:
+    """
+    Receives a [`Span`][vanna.base.tracing.Span] for each stage of the pipeline: `generate_embedding`,
+    `generate_embeddings`, `retrieval.question_sql`, `retrieval.ddl`, `retrieval.documentation`, `get_sql_prompt`,
+    `submit_prompt`, `extract_sql`, `run_sql`, `generate_plotly_code`, `get_plotly_figure` and
+    `get_plotly_figure_json`.
+
+    Set an instance as `tracer` in the config to enable tracing. Subclass it and override `on_span_end` to
+    send the spans somewhere, or override `span` to wrap each stage in a span of another tracing library.
+
+    **Example:**
+    ```python
+    vn = MyVanna(config={"tracer": MetricsTracer()})
+    ```
+    """
+
+    @contextmanager
+    def span(self, name: str, attributes: dict) -> Iterator[Span]:
+        span = Span(name, attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.start
+            self.on_span_end(span)
+
+    def on_span_end(self, span: Span):
+        """
+        Called with every finished span.
+        """
+        pass
+
+
+class MultiTracer(Tracer):
+    """
+    Sends every span to several tracers, e.g. an `OpenTelemetryTracer` and a `MetricsTracer`.
+    """
+
+    def __init__(self, *tracers: Tracer):
+        self.tracers = tracers
+
+    @contextmanager
+    def span(self, name: str, attributes: dict) -> Iterator[Span]:
+        with ExitStack() as stack:
+            spans = [stack.enter_context(tracer.span(name, attributes)) for tracer in self.tracers]
+            yield spans[0] if len(spans) == 1 else _FanOutSpan(spans)
+
+    def render_prometheus(self) -> str:
+        return "".join(
+            tracer.render_prometheus() for tracer in self.tracers if hasattr(tracer, "render_prometheus")
+        )
+
+
+class _FanOutSpan:
+    recording = True
+
+    def __init__(self, spans: list):
+        self.spans = spans
+
+    def set(self, key: str, value):
+        for span in self.spans:
+            span.set(key, value)
+
+
+class MetricsTracer(Tracer):
+    """
+    Aggregates the spans in memory: a histogram of the durations, the number of errors and the totals of the numeric
+    attributes of each stage. [`VannaFlaskAPI`][vanna.flask.VannaFlaskAPI] serves them in the Prometheus text format
+    at `/api/v0/metrics`, to logged in users unless it is created with `public_metrics=True`.
+
+    Args:
+        buckets (List[float]): The upper bounds of the duration histogram buckets, in seconds.
+        prefix (str): The prefix of the metric names.
+    """
+
+    def __init__(
+        self,
+        buckets: List[float] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+        prefix: str = "vanna",
+    ):
+        self.buckets = sorted(buckets)
+        self.prefix = prefix
+        self._stages: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def on_span_end(self, span: Span):
+        with self._lock:
+            stage = self._stages.get(span.name)
+            if stage is None:
+                stage = self._stages[span.name] = {
+                    "count": 0,
+                    "errors": 0,
+                    "duration": 0.0,
+                    "buckets": [0] * (len(self.buckets) + 1),
+                    "totals": {},
+                }
+
+            stage["count"] += 1
+            stage["duration"] += span.duration
+            stage["buckets"][bisect.bisect_left(self.buckets, span.duration)] += 1
+            if span.error is not None:
+                stage["errors"] += 1
+
+            for key, value in span.attributes.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    stage["totals"][key] = stage["totals"].get(key, 0) + value
+
+    def snapshot(self) -> dict:
+        """
+        Get the count, errors, total and mean duration and attribute totals of each stage.
+        """
+        with self._lock:
+            return {
+                name: {
+                    "count": stage["count"],
+                    "errors": stage["errors"],
+                    "duration": stage["duration"],
+                    "mean_duration": stage["duration"] / stage["count"],
+                    **stage["totals"],
+                }
+                for name, stage in self._stages.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def render_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        """
+        duration = f"{self.prefix}_stage_duration_seconds"
+        errors = f"{self.prefix}_stage_errors_total"
+        totals = f"{self.prefix}_stage_attribute_total"
+        lines = [
+            f"# HELP {duration} The duration of each pipeline stage.",
+            f"# TYPE {duration} histogram",
+        ]
+
+        with self._lock:
+            stages = sorted(self._stages.items())
+            for name, stage in stages:
+                cumulative = 0
+                for bound, count in zip(self.buckets + ["+Inf"], stage["buckets"]):
+                    cumulative += count
+                    lines.append(f'{duration}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{duration}_sum{{stage="{name}"}} {stage["duration"]}')
+                lines.append(f'{duration}_count{{stage="{name}"}} {stage["count"]}')
+
+            lines += [f"# HELP {errors} The number of failed pipeline stages.", f"# TYPE {errors} counter"]
+            lines += [f'{errors}{{stage="{name}"}} {stage["errors"]}' for name, stage in stages]
+
+            lines += [
+                f"# HELP {totals} The totals of the tokens, rows, bytes and other counts measured by each stage.",
+                f"# TYPE {totals} counter",
+            ]
+            lines += [
+                f'{totals}{{stage="{name}",attribute="{key}"}} {value}'
+                for name, stage in stages
+                for key, value in sorted(stage["totals"].items())
+            ]
+
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Records every stage as an [OpenTelemetry](https://opentelemetry.io/) span, nested under the span that is
+    current when the pipeline is called. The measured counts become span attributes prefixed with `vanna.`.
+
+    Args:
+        tracer (opentelemetry.trace.Tracer): The tracer to use. Defaults to the tracer of the global tracer provider.
+    """
+
+    def __init__(self, tracer=None):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise DependencyError(
+                "You need to install required dependencies to execute this method,"
+                " run command: \npip install opentelemetry-api"
+            )
+
+        self.tracer = tracer or trace.get_tracer("vanna")
+
+    @contextmanager
+    def span(self, name: str, attributes: dict) -> Iterator[Span]:
+        with self.tracer.start_as_current_span(f"vanna.{name}") as otel_span:
+            span = Span(name, attributes)
+            try:
+                yield span
+            finally:
+                otel_span.set_attributes(
+                    {
+                        f"vanna.{key}": value
+                        for key, value in span.attributes.items()
+                        if isinstance(value, (str, bool, int, float))
+                    }
+                )
@@ -7,6 +7,7 @@ from chromadb.config import Settings
 from chromadb.utils import embedding_functions
 
 from ..base import VannaBase
+from ..base.embedding_cache import embedding_model_id
 from ..utils import deterministic_uuid
 
 default_ef = embedding_functions.DefaultEmbeddingFunction()
@@ -62,6 +63,47 @@ class ChromaDB_VectorStore(VannaBase):
             return embedding[0]
         return embedding
 
+    def generate_embeddings(self, data: List[str], **kwargs) -> List[List[float]]:
+        return list(self.embedding_function(data))
+
+    def _embedding_model_id(self) -> str:
+        return embedding_model_id(self.embedding_function)
+
+    def _add_batch(self, collection, documents: List[str], ids: List[str]):
+        # Chroma rejects duplicate IDs within one call, and deterministic IDs repeat for repeated documents
+        unique = dict(zip(ids, documents))
+        ids, documents = list(unique.keys()), list(unique.values())
+
+        # Older Chroma clients don't report their batch limit
+        get_max_batch_size = getattr(self.chroma_client, "get_max_batch_size", None)
+        max_batch_size = get_max_batch_size() if get_max_batch_size is not None else 5000
+        for start in range(0, len(ids), max_batch_size):
+            batch_documents = documents[start : start + max_batch_size]
+            collection.add(
+                documents=batch_documents,
+                embeddings=self.generate_embeddings(batch_documents),
+                ids=ids[start : start + max_batch_size],
+            )
+
+    def add_question_sql_batch(self, question_sql_list: List[dict], **kwargs) -> List[str]:
+        documents = [
+            json.dumps({"question": item["question"], "sql": item["sql"]}, ensure_ascii=False)
+            for item in question_sql_list
+        ]
+        ids = [deterministic_uuid(document) + "-sql" for document in documents]
+        self._add_batch(self.sql_collection, documents, ids)
+        return ids
+
+    def add_ddl_batch(self, ddl_list: List[str], **kwargs) -> List[str]:
+        ids = [deterministic_uuid(ddl) + "-ddl" for ddl in ddl_list]
+        self._add_batch(self.ddl_collection, ddl_list, ids)
+        return ids
+
+    def add_documentation_batch(self, documentation_list: List[str], **kwargs) -> List[str]:
+        ids = [deterministic_uuid(documentation) + "-doc" for documentation in documentation_list]
+        self._add_batch(self.documentation_collection, documentation_list, ids)
+        return ids
+
     def add_question_sql(self, question: str, sql: str, **kwargs) -> str:
         question_sql_json = json.dumps(
             {
@@ -235,7 +277,7 @@ class ChromaDB_VectorStore(VannaBase):
     def get_similar_question_sql(self, question: str, **kwargs) -> list:
         return ChromaDB_VectorStore._extract_documents(
             self.sql_collection.query(
-                query_texts=[question],
+                query_embeddings=[self.generate_embedding(question)],
                 n_results=self.n_results_sql,
             )
         )
@@ -243,7 +285,7 @@ class ChromaDB_VectorStore(VannaBase):
     def get_related_ddl(self, question: str, **kwargs) -> list:
         return ChromaDB_VectorStore._extract_documents(
             self.ddl_collection.query(
-                query_texts=[question],
+                query_embeddings=[self.generate_embedding(question)],
                 n_results=self.n_results_ddl,
             )
         )
@@ -251,7 +293,7 @@ class ChromaDB_VectorStore(VannaBase):
     def get_related_documentation(self, question: str, **kwargs) -> list:
         return ChromaDB_VectorStore._extract_documents(
             self.documentation_collection.query(
-                query_texts=[question],
+                query_embeddings=[self.generate_embedding(question)],
                 n_results=self.n_results_documentation,
             )
         )
@@ -0,0 +1,8 @@
+from .evaluation import (
+    RateLimiter,
+    evaluate,
+    evaluate_question,
+    load_questions,
+    results_match,
+    summarize,
+)
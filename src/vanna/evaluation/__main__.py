@@ -0,0 +1,77 @@
+"""
+Evaluate a Vanna setup against the question sets in `training_data`.
+
+    python -m vanna.evaluation --vanna my_module:make_vanna --workers 8 --requests-per-second 2 --output results.jsonl
+
+`make_vanna(dataset)` must return a trained Vanna instance connected to the database of the dataset.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+
+from .evaluation import evaluate, load_questions, summarize
+
+
+def _import_factory(path: str):
+    module_name, _, function_name = path.partition(":")
+    if not function_name:
+        raise SystemExit(f"--vanna must look like module:function, got {path!r}")
+
+    # Allow factories defined next to where the command is run
+    sys.path.insert(0, os.getcwd())
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m vanna.evaluation", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vanna", required=True, help="The factory that creates a Vanna instance for a dataset, as module:function")
+    parser.add_argument("--questions", default="training_data/*/questions.json", help="A glob pattern for the question files")
+    parser.add_argument("--datasets", help="A comma-separated list of the datasets to evaluate")
+    parser.add_argument("--limit", type=int, help="The maximum number of questions per dataset")
+    parser.add_argument("--workers", type=int, default=4, help="The number of questions evaluated at once")
+    parser.add_argument("--processes", action="store_true", help="Use processes instead of threads")
+    parser.add_argument("--requests-per-second", type=float, help="The maximum rate at which questions are started")
+    parser.add_argument("--allow-llm-to-see-data", action="store_true")
+    parser.add_argument("--output", help="Write the per-question results to this .csv or .jsonl file")
+    args = parser.parse_args(argv)
+
+    questions = load_questions(args.questions)
+    if args.datasets:
+        datasets = set(args.datasets.split(","))
+        questions = [item for item in questions if item["dataset"] in datasets]
+    if args.limit:
+        limited, counts = [], {}
+        for item in questions:
+            counts[item["dataset"]] = counts.get(item["dataset"], 0) + 1
+            if counts[item["dataset"]] <= args.limit:
+                limited.append(item)
+        questions = limited
+
+    if not questions:
+        raise SystemExit(f"No questions found for {args.questions}")
+
+    results = evaluate(
+        _import_factory(args.vanna),
+        questions,
+        max_workers=args.workers,
+        use_processes=args.processes,
+        requests_per_second=args.requests_per_second,
+        allow_llm_to_see_data=args.allow_llm_to_see_data,
+        progress=lambda done, total: print(f"\r{done}/{total} questions", end="", file=sys.stderr, flush=True),
+    )
+    print(file=sys.stderr)
+
+    if args.output:
+        if args.output.endswith(".csv"):
+            results.to_csv(args.output, index=False)
+        else:
+            results.to_json(args.output, orient="records", lines=True)
+
+    print(json.dumps(summarize(results), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import glob
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Union
+
+import numpy as np
+import pandas as pd
+
+from ..base import VannaBase
+
+
+def load_questions(pattern: str = "training_data/*/questions.json") -> List[dict]:
+    """
+    Load the question sets in the `training_data` directory. Each question is a dict with the `dataset` (the name of
+    the directory it came from), the `question` and the `expected_sql`.
+
+    Args:
+        pattern (str): A glob pattern for the question files.
+
+    Returns:
+        List[dict]: The questions, grouped by dataset.
+    """
+    questions = []
+    for path in sorted(glob.glob(pattern)):
+        dataset = os.path.basename(os.path.dirname(path))
+        with open(path) as f:
+            for item in json.load(f):
+                questions.append(
+                    {"dataset": dataset, "question": item["question"].strip(), "expected_sql": item["answer"]}
+                )
+
+    return questions
+
+
+def _normalize_value(value) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NULL"
+    if isinstance(value, (float, np.floating)):
+        return f"{float(value):.6g}"
+    return str(value)
+
+
+def results_match(expected: pd.DataFrame, actual: pd.DataFrame) -> bool:
+    """
+    Check whether two query results contain the same rows. Column names, column order and row order are ignored and
+    floats are compared to 6 significant digits, so equivalent queries that alias or order their output differently
+    match.
+    """
+    if expected.shape != actual.shape:
+        return False
+
+    def rows(df):
+        return sorted(tuple(sorted(_normalize_value(value) for value in row)) for row in df.itertuples(index=False))
+
+    return rows(expected) == rows(actual)
+
+
+class RateLimiter:
+    """
+    Spaces out calls to `acquire` so they happen at most `rate` times per second on average, allowing bursts of up
+    to `burst` calls.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0
+            self._tokens -= 1
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _Meter:
+    # Measures the LLM calls of one Vanna instance, which only ever runs one question at a time
+    def __init__(self, vn: VannaBase):
+        self.vn = vn
+        self.reset()
+
+        submit_prompt = vn.submit_prompt
+
+        def metered_submit_prompt(prompt, **kwargs):
+            start = time.perf_counter()
+            try:
+                response = submit_prompt(prompt, **kwargs)
+            finally:
+                self.llm_time += time.perf_counter() - start
+
+            self.prompt_tokens += sum(
+                vn.str_to_approx_token_count(message["content"] if isinstance(message, dict) else str(message))
+                for message in prompt
+            )
+            self.completion_tokens += vn.str_to_approx_token_count(response or "")
+            return response
+
+        vn.submit_prompt = metered_submit_prompt
+
+        get_related_context = vn.get_related_context
+
+        def metered_get_related_context(question, **kwargs):
+            # The lookups may overlap with parallel_retrieval, so the stage is timed as a whole
+            start = time.perf_counter()
+            try:
+                return get_related_context(question, **kwargs)
+            finally:
+                self.retrieval_time += time.perf_counter() - start
+
+        vn.get_related_context = metered_get_related_context
+
+    def reset(self):
+        self.retrieval_time = 0.0
+        self.llm_time = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.vn.retrieval_timings = {}
+
+
+_worker_state = threading.local()
+
+
+def _get_meter(vanna_factory: Callable[[str], VannaBase], dataset: str) -> _Meter:
+    # Each thread or process creates its own Vanna instance per dataset and reuses it for every question
+    meters = getattr(_worker_state, "meters", None)
+    if meters is None:
+        meters = _worker_state.meters = {}
+
+    if dataset not in meters:
+        meters[dataset] = _Meter(vanna_factory(dataset))
+
+    return meters[dataset]
+
+
+def evaluate_question(vanna_factory: Callable[[str], VannaBase], item: dict, allow_llm_to_see_data: bool = False) -> dict:
+    """
+    Generate and run the SQL for one question and compare its results with the results of the expected SQL.
+
+    Returns:
+        dict: The question with the generated `sql`, whether it is `correct` (None if the expected SQL failed),
+        the `error` if any, the `total_time` split into `retrieval_time`, `llm_time` and `execution_time`, the
+        time of each retrieval lookup in `retrieval_timings`, the `prompt_tokens`, `completion_tokens` and `rows`.
+    """
+    meter = _get_meter(vanna_factory, item["dataset"])
+    vn = meter.vn
+    meter.reset()
+
+    result = {
+        **item,
+        "sql": None,
+        "correct": None,
+        "error": None,
+        "total_time": None,
+        "retrieval_time": None,
+        "retrieval_timings": None,
+        "llm_time": None,
+        "execution_time": None,
+        "prompt_tokens": None,
+        "completion_tokens": None,
+        "rows": None,
+    }
+
+    start = time.perf_counter()
+    try:
+        result["sql"] = vn.generate_sql(item["question"], allow_llm_to_see_data=allow_llm_to_see_data)
+
+        execution_start = time.perf_counter()
+        df = vn.run_sql(result["sql"])
+        result["execution_time"] = time.perf_counter() - execution_start
+        result["rows"] = len(df)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        df = None
+
+    result["total_time"] = time.perf_counter() - start
+    result["retrieval_time"] = meter.retrieval_time
+    result["retrieval_timings"] = dict(getattr(vn, "retrieval_timings", {}))
+    result["llm_time"] = meter.llm_time
+    result["prompt_tokens"] = meter.prompt_tokens
+    result["completion_tokens"] = meter.completion_tokens
+
+    try:
+        expected = vn.run_sql(item["expected_sql"])
+    except Exception as e:
+        result["error"] = result["error"] or f"Expected SQL failed: {type(e).__name__}: {e}"
+        return result
+
+    result["correct"] = df is not None and results_match(expected, df)
+    return result
+
+
+def evaluate(
+    vanna_factory: Callable[[str], VannaBase],
+    questions: Iterable[dict],
+    max_workers: int = 4,
+    use_processes: bool = False,
+    requests_per_second: Union[float, None] = None,
+    allow_llm_to_see_data: bool = False,
+    progress: Union[Callable[[int, int], None], None] = None,
+) -> pd.DataFrame:
+    """
+    **Example:**
+    ```python
+    def make_vanna(dataset):
+        vn = MyVanna(config={"model": "gpt-4o", "path": f"models/{dataset}"})
+        vn.connect_to_snowflake(...)
+        return vn
+
+    results = evaluate(make_vanna, load_questions(), max_workers=8, requests_per_second=2)
+    print(summarize(results))
+    ```
+
+    Run [`evaluate_question`][vanna.evaluation.evaluation.evaluate_question] for every question on a pool of
+    threads or processes. Each worker creates its own Vanna instance for each dataset with `vanna_factory(dataset)`.
+
+    Args:
+        vanna_factory (Callable[[str], VannaBase]): Creates a trained and connected Vanna instance for a dataset. It must be a module-level function when `use_processes` is True.
+        questions (Iterable[dict]): The questions, e.g. from [`load_questions`][vanna.evaluation.evaluation.load_questions].
+        max_workers (int): The number of questions evaluated at once.
+        use_processes (bool): Use processes instead of threads, for backends that hold the GIL.
+        requests_per_second (float): The maximum rate at which questions are started, to stay under LLM rate limits.
+        allow_llm_to_see_data (bool): Passed to `generate_sql`.
+        progress (Callable[[int, int], None]): Called with the number of finished questions and the total.
+
+    Returns:
+        pd.DataFrame: One row per question with the columns returned by `evaluate_question`.
+    """
+    questions = list(questions)
+    limiter = RateLimiter(requests_per_second) if requests_per_second else None
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+
+    with executor_class(max_workers=max_workers) as executor:
+        futures = []
+        for item in questions:
+            # Throttling the submissions also throttles the starts, since no question starts before it is submitted
+            if limiter is not None:
+                limiter.acquire()
+            futures.append(executor.submit(evaluate_question, vanna_factory, item, allow_llm_to_see_data))
+
+        results = []
+        for future in futures:
+            results.append(future.result())
+            if progress is not None:
+                progress(len(results), len(questions))
+
+    return pd.DataFrame(results)
+
+
+def summarize(results: pd.DataFrame) -> dict:
+    """
+    Summarize the results of [`evaluate`][vanna.evaluation.evaluation.evaluate]: the accuracy over the questions
+    whose expected SQL ran, the p50 and p95 of the total time, the mean time spent in retrieval (also per lookup),
+    the LLM and execution, and the token usage, overall and per dataset.
+    """
+
+    def summarize_group(group: pd.DataFrame) -> dict:
+        scored = group[group["correct"].notna()]
+        total_time = group["total_time"].astype(float)
+        return {
+            "questions": len(group),
+            "accuracy": float(scored["correct"].astype(bool).mean()) if len(scored) else None,
+            "errors": int(group["error"].notna().sum()),
+            "p50_time": float(np.percentile(total_time, 50)) if len(group) else None,
+            "p95_time": float(np.percentile(total_time, 95)) if len(group) else None,
+            "mean_retrieval_time": float(group["retrieval_time"].mean()),
+            "mean_retrieval_timings": {
+                name: float(seconds) for name, seconds in pd.DataFrame(group["retrieval_timings"].tolist()).mean().items()
+            },
+            "mean_llm_time": float(group["llm_time"].mean()),
+            "mean_execution_time": float(group["execution_time"].mean()) if group["execution_time"].notna().any() else None,
+            "prompt_tokens": float(group["prompt_tokens"].sum()),
+            "completion_tokens": float(group["completion_tokens"].sum()),
+        }
+
+    return {
+        **summarize_group(results),
+        "datasets": {dataset: summarize_group(group) for dataset, group in results.groupby("dataset", sort=False)},
+    }
@@ -1,6 +1,10 @@
-import os 
+import os
 import json
 import uuid
+import atexit
+import hashlib
+import threading
+import weakref
 from typing import List, Dict, Any
 
 import faiss
@@ -8,15 +12,32 @@ import numpy as np
 import pandas as pd
 
 from ..base import VannaBase
+from ..base.embedding_cache import embedding_model_id
 from ..exceptions import DependencyError
 
+
+def _flush_at_exit(store_ref):
+    # Holds the store weakly, so registering it with atexit doesn't keep it alive
+    store = store_ref()
+    if store is not None:
+        store.flush()
+
+
+def _faiss_id(entry_id: str) -> int:
+    # FAISS ids are signed 64-bit integers, so derive one from the training data ID
+    return int.from_bytes(hashlib.sha256(entry_id.encode("utf-8")).digest()[:8], "big") >> 1
+
+
 class FAISS(VannaBase):
+    # Maps the collection names used by remove_collection to the prefix of the index and metadata attributes
+    COLLECTIONS = {"sql": "sql", "ddl": "ddl", "documentation": "doc"}
+
     def __init__(self, config=None):
         if config is None:
             config = {}
-        
+
         VannaBase.__init__(self, config=config)
-        
+
         try:
             import faiss
         except ImportError:
@@ -24,13 +45,6 @@ class FAISS(VannaBase):
                 "FAISS is not installed. Please install it with 'pip install faiss-cpu' or 'pip install faiss-gpu'"
             )
 
-        try:
-            from sentence_transformers import SentenceTransformer
-        except ImportError:
-            raise DependencyError(
-                "SentenceTransformer is not installed. Please install it with 'pip install sentence-transformers'."
-            )
-        
         self.path = config.get("path", ".")
         self.embedding_dim = config.get('embedding_dim', 384)
         self.n_results_sql = config.get('n_results_sql', config.get("n_results", 10))
@@ -38,51 +52,201 @@ class FAISS(VannaBase):
         self.n_results_documentation = config.get('n_results_documentation', config.get("n_results", 10))
         self.curr_client = config.get("client", "persistent")
 
+        # With write_behind, additions and removals are buffered and written out by flush(), which runs once
+        # flush_max_items changes are pending, flush_interval seconds after the first pending change, or on exit
+        self.write_behind = config.get("write_behind", False)
+        self.flush_max_items = config.get("flush_max_items", 1000)
+        self.flush_interval = config.get("flush_interval", 5.0)
+        self._lock = threading.RLock()
+        self._flush_timer = None
+        self._pending = {prefix: [] for prefix in self.COLLECTIONS.values()}
+        self._dirty = set()
+        self._rewrite = set()
+        self._log_lines = {}
+
+        # Metadata is keyed by the FAISS id of each entry, so search results and removals are dictionary lookups
+        self.sql_metadata: Dict[int, Dict[str, Any]] = self._load_or_create_metadata('sql')
+        self.ddl_metadata: Dict[int, Dict[str, str]] = self._load_or_create_metadata('ddl')
+        self.doc_metadata: Dict[int, Dict[str, str]] = self._load_or_create_metadata('doc')
+
         if self.curr_client == 'persistent':
-            self.sql_index = self._load_or_create_index('sql_index.faiss')
-            self.ddl_index = self._load_or_create_index('ddl_index.faiss')
-            self.doc_index = self._load_or_create_index('doc_index.faiss')
+            self.sql_index = self._load_or_create_index('sql_index.faiss', self.sql_metadata)
+            self.ddl_index = self._load_or_create_index('ddl_index.faiss', self.ddl_metadata)
+            self.doc_index = self._load_or_create_index('doc_index.faiss', self.doc_metadata)
         elif self.curr_client == 'in-memory':
-            self.sql_index = faiss.IndexFlatL2(self.embedding_dim)
-            self.ddl_index = faiss.IndexFlatL2(self.embedding_dim)
-            self.doc_index = faiss.IndexFlatL2(self.embedding_dim)
+            self.sql_index = self._create_index()
+            self.ddl_index = self._create_index()
+            self.doc_index = self._create_index()
         elif isinstance(self.curr_client, list) and len(self.curr_client) == 3 and all(isinstance(idx, faiss.Index) for idx in self.curr_client):
-            self.sql_index = self.curr_client[0]
-            self.ddl_index = self.curr_client[1]
-            self.doc_index = self.curr_client[2]
+            self.sql_index = self._ensure_id_map(self.curr_client[0], self.sql_metadata)
+            self.ddl_index = self._ensure_id_map(self.curr_client[1], self.ddl_metadata)
+            self.doc_index = self._ensure_id_map(self.curr_client[2], self.doc_metadata)
         else:
             raise ValueError(f"Unsupported storage type was set in config: {self.curr_client}")
 
-        self.sql_metadata: List[Dict[str, Any]] = self._load_or_create_metadata('sql_metadata.json')
-        self.ddl_metadata: List[Dict[str, str]] = self._load_or_create_metadata('ddl_metadata.json')
-        self.doc_metadata: List[Dict[str, str]] = self._load_or_create_metadata('doc_metadata.json')
+        # embedding_model is the name of a SentenceTransformer model, or a loaded model with an encode method
+        model = config.get('embedding_model', 'all-MiniLM-L6-v2')
+        self._embedding_model_name = embedding_model_id(model)
+        if isinstance(model, str):
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                raise DependencyError(
+                    "SentenceTransformer is not installed. Please install it with 'pip install sentence-transformers'."
+                )
 
-        model_name = config.get('embedding_model', 'all-MiniLM-L6-v2')
-        self.embedding_model = SentenceTransformer(model_name)
+            model = SentenceTransformer(model)
+        self.embedding_model = model
 
-    def _load_or_create_index(self, filename):
-        filepath = os.path.join(self.path, filename)
-        if os.path.exists(filepath):
-            return faiss.read_index(filepath)
-        return faiss.IndexFlatL2(self.embedding_dim)
+        if self.write_behind:
+            atexit.register(_flush_at_exit, weakref.ref(self))
 
-    def _load_or_create_metadata(self, filename):
+    def _create_index(self):
+        return faiss.IndexIDMap(faiss.IndexFlatL2(self.embedding_dim))
+
+    def _ensure_id_map(self, index, metadata):
+        """
+        Wraps an index in an IndexIDMap so entries can be removed by id. Indexes written by earlier versions
+        store vectors by position, so their stored vectors are moved over without embedding anything again.
+        """
+        if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            return index
+
+        if index.ntotal == 0:
+            return faiss.IndexIDMap(index)
+
+        if index.ntotal != len(metadata):
+            raise ValueError(
+                f"The index holds {index.ntotal} vectors but there are {len(metadata)} metadata entries"
+            )
+
+        vectors = index.reconstruct_n(0, index.ntotal)
+        index.reset()
+        id_map = faiss.IndexIDMap(index)
+        id_map.add_with_ids(vectors, np.fromiter(metadata.keys(), dtype=np.int64, count=len(metadata)))
+        return id_map
+
+    def _load_or_create_index(self, filename, metadata):
         filepath = os.path.join(self.path, filename)
         if os.path.exists(filepath):
+            return self._ensure_id_map(faiss.read_index(filepath), metadata)
+        return self._create_index()
+
+    def _load_or_create_metadata(self, prefix):
+        """
+        Metadata is stored as an append-only JSON Lines log, where a line is either an entry or a removal marker.
+        Metadata files written by earlier versions hold a single JSON list and are rewritten as a log on the next flush.
+        """
+        log_path = os.path.join(self.path, f"{prefix}_metadata.jsonl")
+        filepath = os.path.join(self.path, f"{prefix}_metadata.json")
+        metadata = {}
+
+        if os.path.exists(log_path):
+            n_lines = 0
+            with open(log_path, 'r') as f:
+                lines = f.readlines()
+            if lines and not lines[-1].endswith("\n"):
+                self._rewrite.add(prefix)
+
+            for i, line in enumerate(lines):
+                if not line.strip():
+                    continue
+
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    if i < len(lines) - 1:
+                        raise
+                    # The last line was cut short by a crash while appending. Its change is lost, and the log is
+                    # rewritten on the next flush so later lines aren't appended to the broken one
+                    self._rewrite.add(prefix)
+                    continue
+
+                if item.get("_removed", False):
+                    metadata.pop(_faiss_id(item["id"]), None)
+                else:
+                    metadata[_faiss_id(item["id"])] = item
+                n_lines += 1
+            self._log_lines[prefix] = n_lines
+        elif os.path.exists(filepath):
             with open(filepath, 'r') as f:
-                return json.load(f)
-        return []
+                metadata = {_faiss_id(item["id"]): item for item in json.load(f)}
+            self._rewrite.add(prefix)
+
+        return metadata
+
+    def _atomic_write(self, filepath, write):
+        # Write to a temporary file and rename it, so a crash never leaves a half-written file behind
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, filepath)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
     def _save_index(self, index, filename):
         if self.curr_client == 'persistent':
             filepath = os.path.join(self.path, filename)
-            faiss.write_index(index, filepath)
+            self._atomic_write(filepath, lambda tmp_path: faiss.write_index(index, tmp_path))
 
-    def _save_metadata(self, metadata, filename):
-        if self.curr_client == 'persistent':
-            filepath = os.path.join(self.path, filename)
-            with open(filepath, 'w') as f:
-                json.dump(metadata, f)
+    def _save_metadata(self, prefix):
+        if self.curr_client != 'persistent':
+            self._pending[prefix].clear()
+            return
+
+        log_path = os.path.join(self.path, f"{prefix}_metadata.jsonl")
+        metadata = getattr(self, f"{prefix}_metadata")
+        pending = self._pending[prefix]
+
+        # Compact the log once removed entries make up most of it
+        n_lines = self._log_lines.get(prefix, 0) + len(pending)
+        if prefix in self._rewrite or n_lines > 2 * len(metadata) + self.flush_max_items:
+            def write(tmp_path):
+                with open(tmp_path, 'w') as f:
+                    for item in metadata.values():
+                        f.write(json.dumps(item) + "\n")
+
+            self._atomic_write(log_path, write)
+            self._log_lines[prefix] = len(metadata)
+            self._rewrite.discard(prefix)
+
+            # The log replaces a metadata file written by an earlier version, which is kept as a backup
+            legacy_path = os.path.join(self.path, f"{prefix}_metadata.json")
+            if os.path.exists(legacy_path):
+                os.replace(legacy_path, f"{legacy_path}.bak")
+        elif pending:
+            with open(log_path, 'a') as f:
+                f.write("".join(json.dumps(item) + "\n" for item in pending))
+            self._log_lines[prefix] = n_lines
+
+        pending.clear()
+
+    def _save(self, prefix):
+        with self._lock:
+            self._dirty.add(prefix)
+
+            if not self.write_behind or sum(len(pending) for pending in self._pending.values()) >= self.flush_max_items:
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """
+        Writes buffered additions and removals to disk. This only does work when the `write_behind` config is set,
+        otherwise every change is written immediately.
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+            for prefix in list(self._dirty):
+                self._save_metadata(prefix)
+                self._save_index(getattr(self, f"{prefix}_index"), f"{prefix}_index.faiss")
+                self._dirty.discard(prefix)
 
     def generate_embedding(self, data: str, **kwargs) -> List[float]:
         embedding = self.embedding_model.encode(data)
@@ -90,39 +254,68 @@ class FAISS(VannaBase):
             f"Embedding dimension mismatch: expected {self.embedding_dim}, got {embedding.shape[0]}"
         return embedding.tolist()
 
-    def _add_to_index(self, index, metadata_list, text, extra_metadata=None) -> str:
-        embedding = self.generate_embedding(text)
-        index.add(np.array([embedding], dtype=np.float32))
-        entry_id = str(uuid.uuid4())
-        metadata_list.append({"id": entry_id, **(extra_metadata or {})})
-        return entry_id
-    
+    def generate_embeddings(self, data: List[str], **kwargs) -> List[List[float]]:
+        embeddings = self.embedding_model.encode(data)
+        assert embeddings.shape[1] == self.embedding_dim, \
+            f"Embedding dimension mismatch: expected {self.embedding_dim}, got {embeddings.shape[1]}"
+        return embeddings.tolist()
+
+    def _embedding_model_id(self) -> str:
+        return self._embedding_model_name
+
+    def _add_to_index(self, prefix, texts, extra_metadata) -> List[str]:
+        if len(texts) == 0:
+            return []
+
+        embeddings = self.generate_embeddings(texts) if len(texts) > 1 else [self.generate_embedding(texts[0])]
+        entry_ids = [str(uuid.uuid4()) for _ in texts]
+        faiss_ids = [_faiss_id(entry_id) for entry_id in entry_ids]
+        items = [{"id": entry_id, **extra} for entry_id, extra in zip(entry_ids, extra_metadata)]
+
+        with self._lock:
+            getattr(self, f"{prefix}_index").add_with_ids(
+                np.array(embeddings, dtype=np.float32), np.array(faiss_ids, dtype=np.int64)
+            )
+            metadata = getattr(self, f"{prefix}_metadata")
+            for faiss_id, item in zip(faiss_ids, items):
+                metadata[faiss_id] = item
+            self._pending[prefix] += items
+            self._save(prefix)
+
+        return entry_ids
+
     def add_question_sql(self, question: str, sql: str, **kwargs) -> str:
-        entry_id = self._add_to_index(self.sql_index, self.sql_metadata, question + " " + sql, {"question": question, "sql": sql})
-        self._save_index(self.sql_index, 'sql_index.faiss')
-        self._save_metadata(self.sql_metadata, 'sql_metadata.json')
-        return entry_id
+        return self.add_question_sql_batch([{"question": question, "sql": sql}], **kwargs)[0]
 
     def add_ddl(self, ddl: str, **kwargs) -> str:
-        entry_id = self._add_to_index(self.ddl_index, self.ddl_metadata, ddl, {"ddl": ddl})
-        self._save_index(self.ddl_index, 'ddl_index.faiss')
-        self._save_metadata(self.ddl_metadata, 'ddl_metadata.json')
-        return entry_id
+        return self._add_to_index("ddl", [ddl], [{"ddl": ddl}])[0]
 
     def add_documentation(self, documentation: str, **kwargs) -> str:
-        entry_id = self._add_to_index(self.doc_index, self.doc_metadata, documentation, {"documentation": documentation})
-        self._save_index(self.doc_index, 'doc_index.faiss')
-        self._save_metadata(self.doc_metadata, 'doc_metadata.json')
-        return entry_id
+        return self._add_to_index("doc", [documentation], [{"documentation": documentation}])[0]
+
+    def add_question_sql_batch(self, question_sql_list: List[dict], **kwargs) -> List[str]:
+        return self._add_to_index(
+            "sql",
+            [item["question"] + " " + item["sql"] for item in question_sql_list],
+            [{"question": item["question"], "sql": item["sql"]} for item in question_sql_list],
+        )
 
-    def _get_similar(self, index, metadata_list, text, n_results) -> list:
+    def add_ddl_batch(self, ddl_list: List[str], **kwargs) -> List[str]:
+        return self._add_to_index("ddl", ddl_list, [{"ddl": ddl} for ddl in ddl_list])
+
+    def add_documentation_batch(self, documentation_list: List[str], **kwargs) -> List[str]:
+        return self._add_to_index(
+            "doc", documentation_list, [{"documentation": documentation} for documentation in documentation_list]
+        )
+
+    def _get_similar(self, index, metadata, text, n_results) -> list:
         embedding = self.generate_embedding(text)
         D, I = index.search(np.array([embedding], dtype=np.float32), k=n_results)
-        return [] if len(I[0]) == 0 or I[0][0] == -1 else [metadata_list[i] for i in I[0]]
+        return [metadata[i] for i in I[0] if i != -1 and i in metadata]
 
     def get_similar_question_sql(self, question: str, **kwargs) -> list:
         return self._get_similar(self.sql_index, self.sql_metadata, question, self.n_results_sql)
-    
+
     def get_related_ddl(self, question: str, **kwargs) -> list:
         return [metadata["ddl"] for metadata in self._get_similar(self.ddl_index, self.ddl_metadata, question, self.n_results_ddl)]
 
@@ -130,47 +323,54 @@ class FAISS(VannaBase):
         return [metadata["documentation"] for metadata in self._get_similar(self.doc_index, self.doc_metadata, question, self.n_results_documentation)]
 
     def get_training_data(self, **kwargs) -> pd.DataFrame:
-        sql_data = pd.DataFrame(self.sql_metadata)
+        # Like the other vector stores, the SQL, DDL or documentation of each entry is in the content column
+        sql_data = pd.DataFrame(list(self.sql_metadata.values()), columns=['id', 'question', 'sql'])
+        sql_data['content'] = sql_data['sql']
         sql_data['training_data_type'] = 'sql'
 
-        ddl_data = pd.DataFrame(self.ddl_metadata)
+        ddl_data = pd.DataFrame(list(self.ddl_metadata.values()), columns=['id', 'ddl'])
+        ddl_data['content'] = ddl_data['ddl']
         ddl_data['training_data_type'] = 'ddl'
 
-        doc_data = pd.DataFrame(self.doc_metadata)
+        doc_data = pd.DataFrame(list(self.doc_metadata.values()), columns=['id', 'documentation'])
+        doc_data['content'] = doc_data['documentation']
         doc_data['training_data_type'] = 'documentation'
 
         return pd.concat([sql_data, ddl_data, doc_data], ignore_index=True)
 
     def remove_training_data(self, id: str, **kwargs) -> bool:
-        for metadata_list, index, index_name in [
-            (self.sql_metadata, self.sql_index, 'sql_index.faiss'),
-            (self.ddl_metadata, self.ddl_index, 'ddl_index.faiss'),
-            (self.doc_metadata, self.doc_index, 'doc_index.faiss')
-        ]:
-            for i, item in enumerate(metadata_list):
-                if item['id'] == id:
-                    del metadata_list[i]
-                    new_index = faiss.IndexFlatL2(self.embedding_dim)
-                    embeddings = [self.generate_embedding(json.dumps(m)) for m in metadata_list]
-                    if embeddings:
-                        new_index.add(np.array(embeddings, dtype=np.float32))
-                    setattr(self, index_name.split('.')[0], new_index)
-                    
-                    if self.curr_client == 'persistent':
-                        self._save_index(new_index, index_name)
-                        self._save_metadata(metadata_list, f"{index_name.split('.')[0]}_metadata.json")
-                    
-                    return True
-        return False
+        return self.remove_training_data_batch([id], **kwargs) > 0
+
+    def remove_training_data_batch(self, ids: List[str], **kwargs) -> int:
+        faiss_ids = {_faiss_id(id) for id in ids}
+        removed = 0
+
+        for prefix in self.COLLECTIONS.values():
+            metadata = getattr(self, f"{prefix}_metadata")
+            found = [faiss_id for faiss_id in faiss_ids if faiss_id in metadata]
+            if not found:
+                continue
+
+            with self._lock:
+                # The stored vectors are dropped in place, so nothing has to be embedded again
+                getattr(self, f"{prefix}_index").remove_ids(np.array(found, dtype=np.int64))
+                for faiss_id in found:
+                    self._pending[prefix].append({"id": metadata.pop(faiss_id)["id"], "_removed": True})
+
+                self._save(prefix)
+
+            removed += len(found)
+
+        return removed
 
     def remove_collection(self, collection_name: str) -> bool:
-        if collection_name in ["sql", "ddl", "documentation"]:
-            setattr(self, f"{collection_name}_index", faiss.IndexFlatL2(self.embedding_dim))
-            setattr(self, f"{collection_name}_metadata", [])
-            
-            if self.curr_client == 'persistent':
-                self._save_index(getattr(self, f"{collection_name}_index"), f"{collection_name}_index.faiss")
-                self._save_metadata([], f"{collection_name}_metadata.json")
-            
+        if collection_name in self.COLLECTIONS:
+            prefix = self.COLLECTIONS[collection_name]
+            with self._lock:
+                setattr(self, f"{prefix}_index", self._create_index())
+                setattr(self, f"{prefix}_metadata", {})
+                self._pending[prefix].clear()
+                self._rewrite.add(prefix)
+                self._save(prefix)
             return True
-        return False
\ No newline at end of file
+        return False
@@ -1,95 +1,45 @@
+import io
+import itertools
 import json
 import logging
 import os
 import sys
-import uuid
-from abc import ABC, abstractmethod
-from functools import wraps
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from functools import partial, wraps
+from typing import List, Union
 import importlib.metadata
 
 import flask
 import requests
 from flasgger import Swagger
-from flask import Flask, Response, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory, stream_with_context
 from flask_sock import Sock
 
 from ..base import VannaBase
+from ..exceptions import ValidationError
 from .assets import css_content, html_content, js_content
 from .auth import AuthInterface, NoAuth
+from .cache import BoundedMemoryCache, Cache, DiskCache, MemoryCache
 
 
-class Cache(ABC):
+def event_stream(events) -> Response:
     """
-    Define the interface for a cache that can be used to store data in a Flask app.
+    Send dicts as server-sent events. Errors raised while streaming are sent as an error event.
     """
+    def generate():
+        try:
+            for event in events:
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
 
-    @abstractmethod
-    def generate_id(self, *args, **kwargs):
-        """
-        Generate a unique ID for the cache.
-        """
-        pass
-
-    @abstractmethod
-    def get(self, id, field):
-        """
-        Get a value from the cache.
-        """
-        pass
-
-    @abstractmethod
-    def get_all(self, field_list) -> list:
-        """
-        Get all values from the cache.
-        """
-        pass
-
-    @abstractmethod
-    def set(self, id, field, value):
-        """
-        Set a value in the cache.
-        """
-        pass
-
-    @abstractmethod
-    def delete(self, id):
-        """
-        Delete a value from the cache.
-        """
-        pass
-
-
-class MemoryCache(Cache):
-    def __init__(self):
-        self.cache = {}
-
-    def generate_id(self, *args, **kwargs):
-        return str(uuid.uuid4())
-
-    def set(self, id, field, value):
-        if id not in self.cache:
-            self.cache[id] = {}
-
-        self.cache[id][field] = value
-
-    def get(self, id, field):
-        if id not in self.cache:
-            return None
-
-        if field not in self.cache[id]:
-            return None
-
-        return self.cache[id][field]
-
-    def get_all(self, field_list) -> list:
-        return [
-            {"id": id, **{field: self.get(id=id, field=field) for field in field_list}}
-            for id in self.cache
-        ]
-
-    def delete(self, id):
-        if id in self.cache:
-            del self.cache[id]
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 class VannaFlaskAPI:
@@ -106,14 +56,12 @@ class VannaFlaskAPI:
                     if id is None:
                         return jsonify({"type": "error", "error": "No id provided"})
 
+                field_values = {}
                 for field in required_fields:
-                    if self.cache.get(id=id, field=field) is None:
+                    field_values[field] = self.cache.get(id=id, field=field)
+                    if field_values[field] is None:
                         return jsonify({"type": "error", "error": f"No {field} found"})
 
-                field_values = {
-                    field: self.cache.get(id=id, field=field) for field in required_fields
-                }
-
                 for field in optional_fields:
                     field_values[field] = self.cache.get(id=id, field=field)
 
@@ -139,6 +87,207 @@ class VannaFlaskAPI:
 
         return decorated
 
+    def build_chart(self, id: str, df, question: str, sql: str, chart_instructions: str = None):
+        """
+        Draw the chart of the results of a question. Returns the response of /api/v0/generate_plotly_figure and
+        the fields to cache.
+        """
+        vn = self.vn
+        fields = {}
+
+        if chart_instructions:
+            question = f"{question}. When generating the chart, use these special instructions: {chart_instructions}"
+            code = vn.generate_plotly_code(
+                question=question,
+                sql=sql,
+                df_metadata=f"Running df.dtypes gives:\n {df.dtypes}",
+            )
+            fields["plotly_code"] = code
+        else:
+            code = self.cache.get(id=id, field="plotly_code")
+            if code is None:
+                # Common shapes are charted without a round trip to the LLM
+                code = vn.plan_plotly_code(df, question=question)
+                if code is None:
+                    code = vn.generate_plotly_code(
+                        question=question,
+                        sql=sql,
+                        df_metadata=f"Running df.dtypes gives:\n {df.dtypes}",
+                    )
+                fields["plotly_code"] = code
+
+        # Large results are reduced to what the chart can show before they are sent to the browser
+        df, downsampling = vn.downsample_for_chart(code, df)
+
+        # The figure engine returns the JSON directly, so the figure is never built in the API process
+        fig_json = vn.get_plotly_figure_json(plotly_code=code, df=df, dark_mode=False, downsample=False)
+        if fig_json is None:
+            raise ValidationError("The Plotly code did not create a figure")
+
+        fields["fig_json"] = fig_json
+        fields["downsampling"] = downsampling
+        return self._chart_response(id, fig_json, downsampling), fields
+
+    def build_summary(self, id: str, df, question: str, sql: str = None):
+        """
+        Summarize the results of a question. Returns the response of /api/v0/generate_summary and the fields to
+        cache.
+        """
+        summary = self.vn.generate_summary(question=question, df=df)
+        return {"type": "text", "id": id, "text": summary}, {"summary": summary}
+
+    def build_followup_questions(self, id: str, df, question: str, sql: str):
+        """
+        Suggest followup questions to a question. Returns the response of /api/v0/generate_followup_questions and
+        the fields to cache.
+        """
+        followup_questions = self.vn.generate_followup_questions(question=question, sql=sql, df=df)
+        if followup_questions is not None and len(followup_questions) > 5:
+            followup_questions = followup_questions[:5]
+
+        return self._followup_questions_response(id, followup_questions), {"followup_questions": followup_questions}
+
+    @staticmethod
+    def _chart_response(id: str, fig_json: str, downsampling) -> dict:
+        return {
+            "type": "plotly_figure",
+            "id": id,
+            "fig": fig_json,
+            "downsampled": downsampling is not None,
+            "downsampling": downsampling,
+        }
+
+    @staticmethod
+    def _followup_questions_response(id: str, followup_questions) -> dict:
+        return {
+            "type": "question_list",
+            "id": id,
+            "questions": followup_questions,
+            "header": "Here are some potential followup questions:",
+        }
+
+    def _cached_answer(self, id: str, part: str) -> Union[dict, None]:
+        if part == "chart":
+            fig_json = self.cache.get(id=id, field="fig_json")
+            if fig_json is not None:
+                return self._chart_response(id, fig_json, self.cache.get(id=id, field="downsampling"))
+        elif part == "summary":
+            summary = self.cache.get(id=id, field="summary")
+            if summary is not None:
+                return {"type": "text", "id": id, "text": summary}
+        elif part == "followup_questions":
+            followup_questions = self.cache.get(id=id, field="followup_questions")
+            if followup_questions is not None:
+                return self._followup_questions_response(id, followup_questions)
+
+        return None
+
+    def answer_parts(self, df) -> List[str]:
+        """
+        The parts of the answer the UI shows for a result, out of "chart", "summary" and "followup_questions".
+        """
+        parts = []
+        if self.chart and self.vn.should_generate_chart(df):
+            parts.append("chart")
+        if self.allow_llm_to_see_data and self.config.get("summarization", True):
+            parts.append("summary")
+        if self.allow_llm_to_see_data and self.config.get("followup_questions", True):
+            parts.append("followup_questions")
+        return parts
+
+    def answer_future(self, id: str, part: str, df, question: str, sql: str) -> Future:
+        """
+        Get a future of the response of a part of the answer to a question. The part is computed on the answer
+        executor unless it is already being computed or, with prefetching on, cached.
+        """
+        key = (id, part)
+        build = {
+            "chart": self.build_chart,
+            "summary": self.build_summary,
+            "followup_questions": self.build_followup_questions,
+        }[part]
+
+        with self._answers_lock:
+            future = self._answers.get(key)
+            if future is not None:
+                return future
+            generation = self._generations.get(id, 0)
+
+        # The cache may be on disk, so it is read without holding the lock
+        response = self._cached_answer(id, part) if self.prefetch else None
+
+        with self._answers_lock:
+            future = self._answers.get(key)
+            if future is not None:
+                return future
+
+            # A cached response read while the query was run again may be stale
+            if response is not None and self._generations.get(id, 0) == generation:
+                future = Future()
+                future.set_result(response)
+                return future
+
+            generation = self._generations.get(id, 0)
+
+            def run():
+                response, fields = build(id, df, question, sql)
+                # The cache may be on disk, so it is written holding only the lock of the id
+                with self._write_lock(id):
+                    with self._answers_lock:
+                        # Results of a query that was run again in the meantime are dropped
+                        current = self._generations.get(id, 0) == generation
+                    if current:
+                        for field, value in fields.items():
+                            self.cache.set(id=id, field=field, value=value)
+                return response
+
+            future = self._answer_executor.submit(run)
+            self._answers[key] = future
+
+        future.add_done_callback(partial(self._forget_answer, key))
+        return future
+
+    def _forget_answer(self, key, future: Future):
+        with self._answers_lock:
+            if self._answers.get(key) is future:
+                del self._answers[key]
+            self._forget_generation(key[0])
+
+    def _forget_generation(self, id: str):
+        # Generations are unique, so the generation of an id with nothing being computed can be dropped. Must be
+        # called holding the answers lock.
+        if not any(answer_id == id for answer_id, _ in self._answers):
+            self._generations.pop(id, None)
+
+    def _write_lock(self, id: str) -> threading.Lock:
+        # The cache writes of an id are serialized by one of a fixed set of locks, so there is nothing to clean up
+        return self._write_locks[hash(id) % len(self._write_locks)]
+
+    def close(self):
+        """
+        Stop the threads that compute the answers, after the answers being computed are done.
+        """
+        self._answer_executor.shutdown(wait=True)
+
+    def prefetch_answer(self, id: str, df, question: str, sql: str):
+        """
+        Start computing every part of the answer the UI will ask for, at the same time. Previous results for the
+        id are discarded.
+        """
+        with self._write_lock(id):
+            with self._answers_lock:
+                self._generations[id] = next(self._generation_counter)
+                for part in ("chart", "summary", "followup_questions"):
+                    self._answers.pop((id, part), None)
+            for field in ("fig_json", "downsampling", "summary", "followup_questions"):
+                self.cache.set(id=id, field=field, value=None)
+
+        for part in self.answer_parts(df):
+            self.answer_future(id, part, df, question, sql)
+
+        with self._answers_lock:
+            self._forget_generation(id)
+
     def __init__(
         self,
         vn: VannaBase,
@@ -147,17 +296,21 @@ class VannaFlaskAPI:
         debug=True,
         allow_llm_to_see_data=False,
         chart=True,
+        prefetch=False,
+        public_metrics=False,
     ):
         """
         Expose a Flask API that can be used to interact with a Vanna instance.
 
         Args:
             vn: The Vanna instance to interact with.
-            cache: The cache to use. Defaults to MemoryCache, which uses an in-memory cache. You can also pass in a custom cache that implements the Cache interface.
+            cache: The cache to use. Defaults to MemoryCache, which uses an unbounded in-memory cache. Use BoundedMemoryCache to limit its size, DiskCache to share it between gunicorn workers, or pass in a custom cache that implements the Cache interface.
             auth: The authentication method to use. Defaults to NoAuth, which doesn't require authentication. You can also pass in a custom authentication method that implements the AuthInterface interface.
             debug: Show the debug console. Defaults to True.
             allow_llm_to_see_data: Whether to allow the LLM to see data. Defaults to False.
             chart: Whether to show the chart output in the UI. Defaults to True.
+            prefetch: Whether to start generating the chart, summary and followup questions as soon as the SQL has run, at the same time, so their endpoints only read the results from the cache. Defaults to False.
+            public_metrics: Whether /api/v0/metrics can be read without logging in, e.g. by a Prometheus scraper. The metrics include the timings of each pipeline stage and the row and token counts of recent requests. Defaults to False.
 
         Returns:
             None
@@ -176,6 +329,14 @@ class VannaFlaskAPI:
         self.debug = debug
         self.allow_llm_to_see_data = allow_llm_to_see_data
         self.chart = chart
+        self.prefetch = prefetch
+        self.public_metrics = public_metrics
+        self._answer_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="vanna-answer")
+        self._answers = {}
+        self._answers_lock = threading.Lock()
+        self._generations = {}
+        self._generation_counter = itertools.count(1)
+        self._write_locks = [threading.Lock() for _ in range(64)]
         self.config = {
           "debug": debug,
           "allow_llm_to_see_data": allow_llm_to_see_data,
@@ -354,6 +515,50 @@ class VannaFlaskAPI:
                     }
                 )
 
+        @self.flask_app.route("/api/v0/generate_sql_stream", methods=["GET"])
+        @self.requires_auth
+        def generate_sql_stream(user: any):
+            """
+            Generate SQL from a question, streaming the LLM response as server-sent events
+            ---
+            parameters:
+              - name: user
+                in: query
+              - name: question
+                in: query
+                type: string
+                required: true
+            produces:
+              - text/event-stream
+            responses:
+              200:
+                description: Events with a type of token (the next chunk of the LLM response), intermediate_sql, and finally sql or text like /api/v0/generate_sql
+            """
+            question = flask.request.args.get("question")
+
+            if question is None:
+                return jsonify({"type": "error", "error": "No question provided"})
+
+            id = self.cache.generate_id(question=question)
+            self.cache.set(id=id, field="question", value=question)
+
+            def events():
+                for event in vn.generate_sql_stream(question=question, allow_llm_to_see_data=self.allow_llm_to_see_data):
+                    if event["type"] != "sql":
+                        yield {**event, "id": id}
+                        continue
+
+                    sql = event["text"]
+                    self.cache.set(id=id, field="sql", value=sql)
+
+                    yield {
+                        "type": "sql" if vn.is_sql_valid(sql=sql) else "text",
+                        "id": id,
+                        "text": sql,
+                    }
+
+            return event_stream(events())
+
         @self.flask_app.route("/api/v0/generate_rewritten_question", methods=["GET"])
         @self.requires_auth
         def generate_rewritten_question(user: any):
@@ -470,8 +675,8 @@ class VannaFlaskAPI:
 
         @self.flask_app.route("/api/v0/run_sql", methods=["GET"])
         @self.requires_auth
-        @self.requires_cache(["sql"])
-        def run_sql(user: any, id: str, sql: str):
+        @self.requires_cache(["sql"], optional_fields=["question"])
+        def run_sql(user: any, id: str, sql: str, question: str):
             """
             Run SQL
             ---
@@ -496,6 +701,8 @@ class VannaFlaskAPI:
                       type: object
                     should_generate_chart:
                       type: boolean
+                    truncated:
+                      type: boolean
             """
             try:
                 if not vn.run_sql_is_set:
@@ -510,12 +717,16 @@ class VannaFlaskAPI:
 
                 self.cache.set(id=id, field="df", value=df)
 
+                if self.prefetch:
+                    self.prefetch_answer(id, df, question, sql)
+
                 return jsonify(
                     {
                         "type": "df",
                         "id": id,
                         "df": df.head(10).to_json(orient='records', date_format='iso'),
                         "should_generate_chart": self.chart and vn.should_generate_chart(df),
+                        "truncated": bool(df.attrs.get("truncated", False)),
                     }
                 )
 
@@ -644,6 +855,68 @@ class VannaFlaskAPI:
                 headers={"Content-disposition": f"attachment; filename={id}.csv"},
             )
 
+        @self.flask_app.route("/api/v0/download_parquet", methods=["GET"])
+        @self.requires_auth
+        @self.requires_cache(["df"])
+        def download_parquet(user: any, id: str, df):
+            """
+            Download Parquet
+            ---
+            parameters:
+              - name: user
+                in: query
+              - name: id
+                in: query|body
+                type: string
+                required: true
+            responses:
+              200:
+                description: download Parquet
+            """
+            table = self.vn._import_pyarrow().Table.from_pandas(df, preserve_index=False)
+
+            import pyarrow.parquet
+
+            buffer = io.BytesIO()
+            pyarrow.parquet.write_table(table, buffer)
+
+            return Response(
+                buffer.getvalue(),
+                mimetype="application/vnd.apache.parquet",
+                headers={"Content-disposition": f"attachment; filename={id}.parquet"},
+            )
+
+        @self.flask_app.route("/api/v0/download_arrow", methods=["GET"])
+        @self.requires_auth
+        @self.requires_cache(["df"])
+        def download_arrow(user: any, id: str, df):
+            """
+            Download Arrow IPC stream
+            ---
+            parameters:
+              - name: user
+                in: query
+              - name: id
+                in: query|body
+                type: string
+                required: true
+            responses:
+              200:
+                description: download the results in the Arrow IPC streaming format
+            """
+            pa = self.vn._import_pyarrow()
+            table = pa.Table.from_pandas(df, preserve_index=False)
+
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+
+            return Response(
+                sink.getvalue().to_pybytes(),
+                mimetype="application/vnd.apache.arrow.stream",
+                headers={"Content-disposition": f"attachment; filename={id}.arrows"},
+            )
+
         @self.flask_app.route("/api/v0/generate_plotly_figure", methods=["GET"])
         @self.requires_auth
         @self.requires_cache(["df", "question", "sql"])
@@ -673,34 +946,26 @@ class VannaFlaskAPI:
                       type: string
                     fig:
                       type: object
+                    downsampled:
+                      type: boolean
+                    downsampling:
+                      type: object
             """
             chart_instructions = flask.request.args.get('chart_instructions')
 
             try:
-                # If chart_instructions is not set then attempt to retrieve the code from the cache
                 if chart_instructions is None or len(chart_instructions) == 0:
-                    code = self.cache.get(id=id, field="plotly_code")
-                else:
-                    question = f"{question}. When generating the chart, use these special instructions: {chart_instructions}"
-                    code = vn.generate_plotly_code(
-                        question=question,
-                        sql=sql,
-                        df_metadata=f"Running df.dtypes gives:\n {df.dtypes}",
-                    )
-                    self.cache.set(id=id, field="plotly_code", value=code)
+                    if self.prefetch:
+                        return jsonify(self.answer_future(id, "chart", df, question, sql).result())
 
-                fig = vn.get_plotly_figure(plotly_code=code, df=df, dark_mode=False)
-                fig_json = fig.to_json()
+                    response, fields = self.build_chart(id, df, question, sql)
+                else:
+                    response, fields = self.build_chart(id, df, question, sql, chart_instructions=chart_instructions)
 
-                self.cache.set(id=id, field="fig_json", value=fig_json)
+                for field, value in fields.items():
+                    self.cache.set(id=id, field=field, value=value)
 
-                return jsonify(
-                    {
-                        "type": "plotly_figure",
-                        "id": id,
-                        "fig": fig_json,
-                    }
-                )
+                return jsonify(response)
             except Exception as e:
                 # Print the stack trace
                 import traceback
@@ -960,22 +1225,13 @@ class VannaFlaskAPI:
                       type: string
             """
             if self.allow_llm_to_see_data:
-                followup_questions = vn.generate_followup_questions(
-                    question=question, sql=sql, df=df
-                )
-                if followup_questions is not None and len(followup_questions) > 5:
-                    followup_questions = followup_questions[:5]
+                if self.prefetch:
+                    return jsonify(self.answer_future(id, "followup_questions", df, question, sql).result())
 
-                self.cache.set(id=id, field="followup_questions", value=followup_questions)
+                response, fields = self.build_followup_questions(id, df, question, sql)
+                self.cache.set(id=id, field="followup_questions", value=fields["followup_questions"])
 
-                return jsonify(
-                    {
-                        "type": "question_list",
-                        "id": id,
-                        "questions": followup_questions,
-                        "header": "Here are some potential followup questions:",
-                    }
-                )
+                return jsonify(response)
             else:
                 self.cache.set(id=id, field="followup_questions", value=[])
                 return jsonify(
@@ -987,6 +1243,59 @@ class VannaFlaskAPI:
                     }
                 )
 
+        @self.flask_app.route("/api/v0/generate_followup_questions_stream", methods=["GET"])
+        @self.requires_auth
+        @self.requires_cache(["df", "question", "sql"])
+        def generate_followup_questions_stream(user: any, id: str, df, question, sql):
+            """
+            Generate followup questions, streaming each question as a server-sent event as soon as it is complete
+            ---
+            parameters:
+              - name: user
+                in: query
+              - name: id
+                in: query|body
+                type: string
+                required: true
+            produces:
+              - text/event-stream
+            responses:
+              200:
+                description: Events with a type of question, and finally a question_list like /api/v0/generate_followup_questions
+            """
+            if not self.allow_llm_to_see_data:
+                self.cache.set(id=id, field="followup_questions", value=[])
+                return event_stream(
+                    [
+                        {
+                            "type": "question_list",
+                            "id": id,
+                            "questions": [],
+                            "header": "Followup Questions can be enabled if you set allow_llm_to_see_data=True",
+                        }
+                    ]
+                )
+
+            def events():
+                followup_questions = []
+                for followup_question in vn.generate_followup_questions_stream(question=question, sql=sql, df=df):
+                    followup_questions.append(followup_question)
+                    yield {"type": "question", "id": id, "text": followup_question}
+
+                    if len(followup_questions) == 5:
+                        break
+
+                self.cache.set(id=id, field="followup_questions", value=followup_questions)
+
+                yield {
+                    "type": "question_list",
+                    "id": id,
+                    "questions": followup_questions,
+                    "header": "Here are some potential followup questions:",
+                }
+
+            return event_stream(events())
+
         @self.flask_app.route("/api/v0/generate_summary", methods=["GET"])
         @self.requires_auth
         @self.requires_cache(["df", "question"])
@@ -1015,17 +1324,13 @@ class VannaFlaskAPI:
                       type: string
             """
             if self.allow_llm_to_see_data:
-                summary = vn.generate_summary(question=question, df=df)
+                if self.prefetch:
+                    return jsonify(self.answer_future(id, "summary", df, question, None).result())
 
-                self.cache.set(id=id, field="summary", value=summary)
+                response, fields = self.build_summary(id, df, question)
+                self.cache.set(id=id, field="summary", value=fields["summary"])
 
-                return jsonify(
-                    {
-                        "type": "text",
-                        "id": id,
-                        "text": summary,
-                    }
-                )
+                return jsonify(response)
             else:
                 return jsonify(
                     {
@@ -1035,6 +1340,80 @@ class VannaFlaskAPI:
                     }
                 )
 
+        @self.flask_app.route("/api/v0/generate_summary_stream", methods=["GET"])
+        @self.requires_auth
+        @self.requires_cache(["df", "question"])
+        def generate_summary_stream(user: any, id: str, df, question):
+            """
+            Generate summary, streaming the LLM response as server-sent events
+            ---
+            parameters:
+              - name: user
+                in: query
+              - name: id
+                in: query|body
+                type: string
+                required: true
+            produces:
+              - text/event-stream
+            responses:
+              200:
+                description: Events with a type of token (the next chunk of the summary), and finally text like /api/v0/generate_summary
+            """
+            if not self.allow_llm_to_see_data:
+                return event_stream(
+                    [
+                        {
+                            "type": "text",
+                            "id": id,
+                            "text": "Summarization can be enabled if you set allow_llm_to_see_data=True",
+                        }
+                    ]
+                )
+
+            def events():
+                summary = ""
+                for chunk in vn.generate_summary_stream(question=question, df=df):
+                    summary += chunk
+                    yield {"type": "token", "id": id, "text": chunk}
+
+                self.cache.set(id=id, field="summary", value=summary)
+
+                yield {"type": "text", "id": id, "text": summary}
+
+            return event_stream(events())
+
+        @self.flask_app.route("/api/v0/generate_answer_stream", methods=["GET"])
+        @self.requires_auth
+        @self.requires_cache(["df", "question", "sql"])
+        def generate_answer_stream(user: any, id: str, df, question, sql):
+            """
+            Generate the chart, summary and followup questions at the same time, streaming each as a server-sent event as soon as it is ready
+            ---
+            parameters:
+              - name: user
+                in: query
+              - name: id
+                in: query|body
+                type: string
+                required: true
+            produces:
+              - text/event-stream
+            responses:
+              200:
+                description: The responses of /api/v0/generate_plotly_figure, /api/v0/generate_summary and /api/v0/generate_followup_questions as events, in the order they finish
+            """
+            futures = [self.answer_future(id, part, df, question, sql) for part in self.answer_parts(df)]
+
+            def events():
+                for future in as_completed(futures):
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        yield {"type": "error", "id": id, "error": str(e)}
+
+            return event_stream(events())
+
         @self.flask_app.route("/api/v0/load_question", methods=["GET"])
         @self.requires_auth
         @self.requires_cache(
@@ -1118,6 +1497,27 @@ class VannaFlaskAPI:
                 }
             )
 
+        def metrics(user: any = None):
+            """
+            Get the pipeline stage metrics in the Prometheus text format. Set a MetricsTracer as the tracer in the Vanna config to collect them.
+            ---
+            produces:
+              - text/plain
+            responses:
+              200:
+                description: The metrics of the MetricsTracer
+            """
+            tracer = (getattr(vn, "config", None) or {}).get("tracer", None)
+            if not hasattr(tracer, "render_prometheus"):
+                return jsonify({"type": "error", "error": "No MetricsTracer is set as the tracer in the Vanna config"}), 404
+
+            return Response(tracer.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+        # Scrapers that cannot log in need public_metrics
+        self.flask_app.route("/api/v0/metrics", methods=["GET"])(
+            metrics if self.public_metrics else self.requires_auth(metrics)
+        )
+
         @self.flask_app.route("/api/v0/<path:catch_all>", methods=["GET", "POST"])
         def catch_all(catch_all):
             return jsonify(
@@ -1190,13 +1590,15 @@ class VannaFlaskApp(VannaFlaskAPI):
         function_generation=True,
         index_html_path=None,
         assets_folder=None,
+        prefetch=False,
+        public_metrics=False,
     ):
         """
         Expose a Flask app that can be used to interact with a Vanna instance.
 
         Args:
             vn: The Vanna instance to interact with.
-            cache: The cache to use. Defaults to MemoryCache, which uses an in-memory cache. You can also pass in a custom cache that implements the Cache interface.
+            cache: The cache to use. Defaults to MemoryCache, which uses an unbounded in-memory cache. Use BoundedMemoryCache to limit its size, DiskCache to share it between gunicorn workers, or pass in a custom cache that implements the Cache interface.
             auth: The authentication method to use. Defaults to NoAuth, which doesn't require authentication. You can also pass in a custom authentication method that implements the AuthInterface interface.
             debug: Show the debug console. Defaults to True.
             allow_llm_to_see_data: Whether to allow the LLM to see data. Defaults to False.
@@ -1216,11 +1618,13 @@ class VannaFlaskApp(VannaFlaskAPI):
             summarization: Whether to show summarization. Defaults to True.
             index_html_path: Path to the index.html. Defaults to None, which will use the default index.html
             assets_folder: The location where you'd like to serve the static assets from. Defaults to None, which will use hardcoded Python variables.
+            prefetch: Whether to start generating the chart, summary and followup questions as soon as the SQL has run, at the same time, so the UI gets them from the cache. Defaults to False.
+            public_metrics: Whether /api/v0/metrics can be read without logging in, e.g. by a Prometheus scraper. Defaults to False.
 
         Returns:
             None
         """
-        super().__init__(vn, cache, auth, debug, allow_llm_to_see_data, chart)
+        super().__init__(vn, cache, auth, debug, allow_llm_to_see_data, chart, prefetch, public_metrics)
 
         self.config["logo"] = logo
         self.config["title"] = title
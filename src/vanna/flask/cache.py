@@ -0,0 +1,490 @@
+import io
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Union
+
+import pandas as pd
+
+
+class Cache(ABC):
+    """
+    Define the interface for a cache that can be used to store data in a Flask app.
+    """
+
+    @abstractmethod
+    def generate_id(self, *args, **kwargs):
+        """
+        Generate a unique ID for the cache.
+        """
+        pass
+
+    @abstractmethod
+    def get(self, id, field):
+        """
+        Get a value from the cache.
+        """
+        pass
+
+    @abstractmethod
+    def get_all(self, field_list) -> list:
+        """
+        Get all values from the cache.
+        """
+        pass
+
+    @abstractmethod
+    def set(self, id, field, value):
+        """
+        Set a value in the cache.
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, id):
+        """
+        Delete a value from the cache.
+        """
+        pass
+
+
+class MemoryCache(Cache):
+    def __init__(self):
+        self.cache = {}
+
+    def generate_id(self, *args, **kwargs):
+        return str(uuid.uuid4())
+
+    def set(self, id, field, value):
+        if id not in self.cache:
+            self.cache[id] = {}
+
+        self.cache[id][field] = value
+
+    def get(self, id, field):
+        if id not in self.cache:
+            return None
+
+        if field not in self.cache[id]:
+            return None
+
+        return self.cache[id][field]
+
+    def get_all(self, field_list) -> list:
+        return [
+            {"id": id, **{field: self.get(id=id, field=field) for field in field_list}}
+            for id in self.cache
+        ]
+
+    def delete(self, id):
+        if id in self.cache:
+            del self.cache[id]
+
+
+def sizeof(value) -> int:
+    """
+    Estimate the number of bytes a cached value takes up. DataFrames are measured with `memory_usage(deep=True)`.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+
+    try:
+        return sys.getsizeof(json.dumps(value))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class BoundedMemoryCache(Cache):
+    """
+    An in-process cache that evicts the least recently used question once it holds more than `max_entries` questions
+    or more than `max_bytes` of data, and drops questions older than `ttl` seconds.
+
+    Every gunicorn worker has its own copy of this cache, so a follow-up request that lands on another worker will
+    not find the question. Use [`DiskCache`][vanna.flask.cache.DiskCache] or sticky sessions when running several workers.
+
+    **Example:**
+    ```python
+    VannaFlaskApp(vn, cache=BoundedMemoryCache(max_bytes=512 * 1024 * 1024, ttl=3600))
+    ```
+
+    Args:
+        max_entries (int): The maximum number of questions kept. Set to None for no limit.
+        max_bytes (int): The maximum total size of the cached values. Set to None for no limit.
+        ttl (float): The number of seconds a question stays in the cache. Set to None to never expire questions.
+    """
+
+    def __init__(
+        self,
+        max_entries: Union[int, None] = 1000,
+        max_bytes: Union[int, None] = 256 * 1024 * 1024,
+        ttl: Union[float, None] = 24 * 60 * 60,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.cache = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.RLock()
+
+    def generate_id(self, *args, **kwargs):
+        return str(uuid.uuid4())
+
+    def _expire(self):
+        if self.ttl is None:
+            return
+
+        cutoff = time.time() - self.ttl
+        for id in [id for id, entry in self.cache.items() if entry["created_at"] < cutoff]:
+            self._remove(id)
+            self.expirations += 1
+
+    def _remove(self, id):
+        entry = self.cache.pop(id)
+        self.nbytes -= sum(entry["sizes"].values())
+
+    def _evict(self):
+        while len(self.cache) > 1 and (
+            (self.max_entries is not None and len(self.cache) > self.max_entries)
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self.cache)))
+            self.evictions += 1
+
+    def set(self, id, field, value):
+        size = sizeof(value)
+
+        with self._lock:
+            self._expire()
+
+            entry = self.cache.get(id)
+            if entry is None:
+                entry = self.cache[id] = {"created_at": time.time(), "values": {}, "sizes": {}}
+
+            self.nbytes += size - entry["sizes"].get(field, 0)
+            entry["values"][field] = value
+            entry["sizes"][field] = size
+            self.cache.move_to_end(id)
+
+            self._evict()
+
+    def get(self, id, field):
+        with self._lock:
+            self._expire()
+
+            entry = self.cache.get(id)
+            if entry is None or field not in entry["values"]:
+                self.misses += 1
+                return None
+
+            self.cache.move_to_end(id)
+            self.hits += 1
+            return entry["values"][field]
+
+    def get_all(self, field_list) -> list:
+        with self._lock:
+            self._expire()
+
+            entries = sorted(self.cache.items(), key=lambda item: item[1]["created_at"])
+            return [
+                {"id": id, **{field: entry["values"].get(field) for field in field_list}}
+                for id, entry in entries
+            ]
+
+    def delete(self, id):
+        with self._lock:
+            if id in self.cache:
+                self._remove(id)
+
+    def stats(self) -> dict:
+        """
+        Get the number of cached questions, their total size and the hit, miss and eviction counters.
+        """
+        with self._lock:
+            return {
+                "entries": len(self.cache),
+                "bytes": self.nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __len__(self):
+        return len(self.cache)
+
+
+class DiskCache(Cache):
+    """
+    A cache stored in a SQLite file, so cached questions survive restarts and are shared by every gunicorn worker
+    on the same host. DataFrames are stored as Parquet and other values as JSON.
+
+    The least recently used questions are evicted once the file holds more than `max_entries` questions or more than
+    `max_bytes` of serialized data, and questions older than `ttl` seconds are dropped.
+
+    **Example:**
+    ```python
+    VannaFlaskApp(vn, cache=DiskCache(path="/var/cache/vanna/cache.sqlite", max_bytes=2 * 1024 ** 3))
+    ```
+
+    Args:
+        path (str): The SQLite file to store the cache in.
+        max_entries (int): The maximum number of questions kept. Set to None for no limit.
+        max_bytes (int): The maximum total size of the serialized values. Set to None for no limit.
+        ttl (float): The number of seconds a question stays in the cache. Set to None to never expire questions.
+    """
+
+    def __init__(
+        self,
+        path: str = "vanna_cache.sqlite",
+        max_entries: Union[int, None] = 10000,
+        max_bytes: Union[int, None] = 1024 * 1024 * 1024,
+        ttl: Union[float, None] = 7 * 24 * 60 * 60,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+        # Processes opening the file at the same time must not count the totals while the other adds triggers
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    id TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    format TEXT NOT NULL,
+                    value BLOB,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (id, field)
+                )
+                """
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS cache_created_at ON cache (created_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+
+            # Triggers keep the totals of every process in the file, so the limits are checked without a scan
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_totals (n_entries INTEGER NOT NULL, n_bytes INTEGER NOT NULL)"
+            )
+            self.conn.execute(
+                """
+                INSERT INTO cache_totals SELECT COUNT(DISTINCT id), COALESCE(SUM(size), 0) FROM cache
+                WHERE NOT EXISTS (SELECT 1 FROM cache_totals)
+                """
+            )
+            for trigger in (
+                "cache_insert AFTER INSERT ON cache BEGIN UPDATE cache_totals SET n_bytes = n_bytes + NEW.size,"
+                " n_entries = n_entries + (SELECT COUNT(*) = 1 FROM cache WHERE id = NEW.id); END",
+                "cache_delete AFTER DELETE ON cache BEGIN UPDATE cache_totals SET n_bytes = n_bytes - OLD.size,"
+                " n_entries = n_entries - NOT EXISTS (SELECT 1 FROM cache WHERE id = OLD.id); END",
+                "cache_update AFTER UPDATE OF size ON cache BEGIN"
+                " UPDATE cache_totals SET n_bytes = n_bytes + NEW.size - OLD.size; END",
+            ):
+                self.conn.execute(f"CREATE TRIGGER IF NOT EXISTS {trigger}")
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # A connection must not be shared with processes forked after it was opened, e.g. by gunicorn --preload
+        if self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._pid = os.getpid()
+
+        return self._conn
+
+    def generate_id(self, *args, **kwargs):
+        return str(uuid.uuid4())
+
+    @staticmethod
+    def _serialize(value):
+        if isinstance(value, pd.DataFrame):
+            buffer = io.BytesIO()
+            try:
+                value.to_parquet(buffer)
+                return "parquet", buffer.getvalue()
+            except Exception:
+                # Parquet cannot hold every DataFrame, e.g. object columns with mixed types
+                return "pickle", pickle.dumps(value)
+
+        return "json", json.dumps(value).encode("utf-8")
+
+    @staticmethod
+    def _deserialize(format, value):
+        if format == "parquet":
+            return pd.read_parquet(io.BytesIO(value))
+
+        if format == "pickle":
+            return pickle.loads(value)
+
+        return json.loads(value)
+
+    def _expire(self):
+        if self.ttl is None:
+            return
+
+        # Every field of a question has the creation time of its first field
+        expired = self.conn.execute(
+            "SELECT DISTINCT id FROM cache WHERE created_at < ?", (time.time() - self.ttl,)
+        ).fetchall()
+
+        self.conn.executemany("DELETE FROM cache WHERE id = ?", expired)
+        self.expirations += len(expired)
+
+    def _evict(self, current_id):
+        n_entries, n_bytes = self.conn.execute("SELECT n_entries, n_bytes FROM cache_totals").fetchone()
+
+        def over_limits():
+            return (self.max_entries is not None and n_entries > self.max_entries) or (
+                self.max_bytes is not None and n_bytes > self.max_bytes
+            )
+
+        if not over_limits():
+            return
+
+        # Every field of a question is accessed together, so the index gives the questions in LRU order. The
+        # question being set is never evicted
+        rows = self.conn.execute(
+            "SELECT id FROM cache WHERE id != ? ORDER BY accessed_at", (current_id,)
+        )
+        evicted = []
+        seen = set()
+        for (id,) in rows:
+            if not over_limits():
+                break
+            if id in seen:
+                continue
+
+            seen.add(id)
+            evicted.append((id,))
+            n_entries -= 1
+            n_bytes -= self.conn.execute("SELECT SUM(size) FROM cache WHERE id = ?", (id,)).fetchone()[0]
+        rows.close()
+
+        self.conn.executemany("DELETE FROM cache WHERE id = ?", evicted)
+        self.evictions += len(evicted)
+
+    def set(self, id, field, value):
+        format, data = self._serialize(value)
+        now = time.time()
+
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front so workers evicting at the same time do not deadlock
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    """
+                    INSERT INTO cache (id, field, format, value, size, created_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?, COALESCE((SELECT MIN(created_at) FROM cache WHERE id = ?), ?), ?)
+                    ON CONFLICT (id, field) DO UPDATE SET
+                        format = excluded.format,
+                        value = excluded.value,
+                        size = excluded.size,
+                        accessed_at = excluded.accessed_at
+                    """,
+                    (id, field, format, data, len(data), id, now, now),
+                )
+                self.conn.execute("UPDATE cache SET accessed_at = ? WHERE id = ?", (now, id))
+                self._expire()
+                self._evict(id)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def get(self, id, field):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT format, value, created_at FROM cache WHERE id = ? AND field = ?", (id, field)
+            ).fetchone()
+
+            if row is None or (self.ttl is not None and row[2] < time.time() - self.ttl):
+                self.misses += 1
+                return None
+
+            self.conn.execute("UPDATE cache SET accessed_at = ? WHERE id = ?", (time.time(), id))
+            self.hits += 1
+
+        return self._deserialize(row[0], row[1])
+
+    def get_all(self, field_list) -> list:
+        with self._lock:
+            self._expire()
+
+            ids = [
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT id FROM cache GROUP BY id ORDER BY MIN(created_at)"
+                ).fetchall()
+            ]
+            values = {}
+            if field_list:
+                placeholders = ", ".join("?" for _ in field_list)
+                for id, field, format, value in self.conn.execute(
+                    f"SELECT id, field, format, value FROM cache WHERE field IN ({placeholders})",
+                    list(field_list),
+                ):
+                    values[(id, field)] = (format, value)
+
+        return [
+            {
+                "id": id,
+                **{
+                    field: self._deserialize(*values[(id, field)]) if (id, field) in values else None
+                    for field in field_list
+                },
+            }
+            for id in ids
+        ]
+
+    def delete(self, id):
+        with self._lock:
+            self.conn.execute("DELETE FROM cache WHERE id = ?", (id,))
+
+    def stats(self) -> dict:
+        """
+        Get the number of cached questions and their total size, which are shared by every process using the file,
+        and the hit, miss and eviction counters of this process.
+        """
+        with self._lock:
+            n_entries, n_bytes = self.conn.execute("SELECT n_entries, n_bytes FROM cache_totals").fetchone()
+
+        return {
+            "entries": n_entries,
+            "bytes": n_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT n_entries FROM cache_totals").fetchone()[0]
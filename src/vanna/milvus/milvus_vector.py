@@ -5,6 +5,7 @@ import pandas as pd
 from pymilvus import DataType, MilvusClient, model
 
 from ..base import VannaBase
+from ..base.embedding_cache import embedding_model_id
 
 # Setting the URI as a local file, e.g.`./milvus.db`,
 # is the most convenient method, as it automatically utilizes Milvus Lite
@@ -58,6 +59,12 @@ class Milvus_VectorStore(VannaBase):
     def generate_embedding(self, data: str, **kwargs) -> List[float]:
         return self.embedding_function.encode_documents(data).tolist()
 
+    def generate_embeddings(self, data: List[str], **kwargs) -> List[List[float]]:
+        return [embedding.tolist() for embedding in self.embedding_function.encode_documents(data)]
+
+    def _embedding_model_id(self) -> str:
+        return embedding_model_id(self.embedding_function)
+
 
     def _create_sql_collection(self, name: str):
         if not self.milvus_client.has_collection(collection_name=name):
@@ -178,6 +185,59 @@ class Milvus_VectorStore(VannaBase):
         )
         return _id
 
+    def add_question_sql_batch(self, question_sql_list: List[dict], **kwargs) -> List[str]:
+        if any(len(item["question"]) == 0 or len(item["sql"]) == 0 for item in question_sql_list):
+            raise Exception("pair of question and sql can not be null")
+        ids = [str(uuid.uuid4()) + "-sql" for _ in question_sql_list]
+        embeddings = self.generate_embeddings([item["question"] for item in question_sql_list])
+        self.milvus_client.insert(
+            collection_name="vannasql",
+            data=[
+                {
+                    "id": _id,
+                    "text": item["question"],
+                    "sql": item["sql"],
+                    "vector": embedding
+                }
+                for _id, item, embedding in zip(ids, question_sql_list, embeddings)
+            ]
+        )
+        return ids
+
+    def add_ddl_batch(self, ddl_list: List[str], **kwargs) -> List[str]:
+        if any(len(ddl) == 0 for ddl in ddl_list):
+            raise Exception("ddl can not be null")
+        ids = [str(uuid.uuid4()) + "-ddl" for _ in ddl_list]
+        self.milvus_client.insert(
+            collection_name="vannaddl",
+            data=[
+                {
+                    "id": _id,
+                    "ddl": ddl,
+                    "vector": embedding
+                }
+                for _id, ddl, embedding in zip(ids, ddl_list, self.generate_embeddings(ddl_list))
+            ]
+        )
+        return ids
+
+    def add_documentation_batch(self, documentation_list: List[str], **kwargs) -> List[str]:
+        if any(len(documentation) == 0 for documentation in documentation_list):
+            raise Exception("documentation can not be null")
+        ids = [str(uuid.uuid4()) + "-doc" for _ in documentation_list]
+        self.milvus_client.insert(
+            collection_name="vannadoc",
+            data=[
+                {
+                    "id": _id,
+                    "doc": documentation,
+                    "vector": embedding
+                }
+                for _id, documentation, embedding in zip(ids, documentation_list, self.generate_embeddings(documentation_list))
+            ]
+        )
+        return ids
+
     def get_training_data(self, **kwargs) -> pd.DataFrame:
         sql_data = self.milvus_client.query(
             collection_name="vannasql",
@@ -30,6 +30,7 @@ class Ollama(VannaBase):
     self.ollama_timeout = config.get("ollama_timeout", 240.0)
 
     self.ollama_client = ollama.Client(self.host, timeout=Timeout(self.ollama_timeout))
+    self.async_ollama_client = ollama.AsyncClient(self.host, timeout=Timeout(self.ollama_timeout))
     self.keep_alive = config.get('keep_alive', None)
     self.ollama_options = config.get('options', {})
     self.num_ctx = self.ollama_options.get('num_ctx', 2048)
@@ -43,6 +44,12 @@ class Ollama(VannaBase):
     if model not in model_lists:
       ollama_client.pull(model)
 
+  def get_prompt_token_budget(self) -> int:
+    # Ollama silently cuts prompts that are longer than num_ctx, so the prompt and the response must fit in it
+    num_predict = self.ollama_options.get('num_predict', -1)
+    response_tokens = num_predict if num_predict > 0 else min(1024, self.num_ctx // 4)
+    return min(super().get_prompt_token_budget(), self.num_ctx - response_tokens)
+
   def system_message(self, message: str) -> any:
     return {"role": "system", "content": message}
 
@@ -101,3 +108,41 @@ class Ollama(VannaBase):
     self.log(f"Ollama Response:\n{str(response_dict)}")
 
     return response_dict['message']['content']
+
+  def submit_prompt_stream(self, prompt, **kwargs):
+    self.log(
+      f"Ollama parameters:\n"
+      f"model={self.model},\n"
+      f"options={self.ollama_options},\n"
+      f"keep_alive={self.keep_alive}")
+    self.log(f"Prompt Content:\n{json.dumps(prompt, ensure_ascii=False)}")
+    stream = self.ollama_client.chat(model=self.model,
+                                     messages=prompt,
+                                     stream=True,
+                                     options=self.ollama_options,
+                                     keep_alive=self.keep_alive)
+
+    try:
+      for chunk in stream:
+        if chunk['message']['content']:
+          yield chunk['message']['content']
+    finally:
+      # Closing the generator closes the HTTP response, which stops the generation
+      stream.close()
+
+  async def asubmit_prompt(self, prompt, **kwargs) -> str:
+    self.log(
+      f"Ollama parameters:\n"
+      f"model={self.model},\n"
+      f"options={self.ollama_options},\n"
+      f"keep_alive={self.keep_alive}")
+    self.log(f"Prompt Content:\n{json.dumps(prompt, ensure_ascii=False)}")
+    response_dict = await self.async_ollama_client.chat(model=self.model,
+                                                        messages=prompt,
+                                                        stream=False,
+                                                        options=self.ollama_options,
+                                                        keep_alive=self.keep_alive)
+
+    self.log(f"Ollama Response:\n{str(response_dict)}")
+
+    return response_dict['message']['content']
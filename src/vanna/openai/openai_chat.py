@@ -1,8 +1,10 @@
 import os
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from ..base import VannaBase
+from ..base.tokenizer import TiktokenTokenizer
+from ..exceptions import DependencyError
 
 
 class OpenAI_Chat(VannaBase):
@@ -12,6 +14,9 @@ class OpenAI_Chat(VannaBase):
         # default parameters - can be overrided using config
         self.temperature = 0.7
 
+        # Pass an AsyncOpenAI client as async_client in the config to use it for asubmit_prompt
+        self.async_client = config.get("async_client", None) if config is not None else None
+
         if "temperature" in config:
             self.temperature = config["temperature"]
 
@@ -36,10 +41,26 @@ class OpenAI_Chat(VannaBase):
 
         if config is None and client is None:
             self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self.async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
             return
 
         if "api_key" in config:
             self.client = OpenAI(api_key=config["api_key"])
+            if self.async_client is None:
+                self.async_client = AsyncOpenAI(api_key=config["api_key"])
+
+    def get_tokenizer(self):
+        if self.config.get("tokenizer", None) is not None:
+            return super().get_tokenizer()
+
+        # Default to the model's own encoding when tiktoken is installed
+        if not hasattr(self, "_tiktoken_tokenizer"):
+            try:
+                self._tiktoken_tokenizer = TiktokenTokenizer(model=self.config.get("model", None))
+            except DependencyError:
+                self._tiktoken_tokenizer = None
+
+        return self._tiktoken_tokenizer or super().get_tokenizer()
 
     def system_message(self, message: str) -> any:
         return {"role": "system", "content": message}
@@ -50,7 +71,7 @@ class OpenAI_Chat(VannaBase):
     def assistant_message(self, message: str) -> any:
         return {"role": "assistant", "content": message}
 
-    def submit_prompt(self, prompt, **kwargs) -> str:
+    def _get_completion_kwargs(self, prompt, **kwargs) -> dict:
         if prompt is None:
             raise Exception("Prompt is None")
 
@@ -58,67 +79,50 @@ class OpenAI_Chat(VannaBase):
             raise Exception("Prompt is empty")
 
         # Count the number of tokens in the message log
-        # Use 4 as an approximation for the number of characters per token
         num_tokens = 0
         for message in prompt:
-            num_tokens += len(message["content"]) / 4
+            num_tokens += self.str_to_approx_token_count(message["content"])
 
         if kwargs.get("model", None) is not None:
             model = kwargs.get("model", None)
             print(
-                f"Using model {model} for {num_tokens} tokens (approx)"
-            )
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
+                f"Using model {model} for {num_tokens} tokens"
             )
+            completion_kwargs = {"model": model}
         elif kwargs.get("engine", None) is not None:
             engine = kwargs.get("engine", None)
             print(
-                f"Using model {engine} for {num_tokens} tokens (approx)"
-            )
-            response = self.client.chat.completions.create(
-                engine=engine,
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
+                f"Using model {engine} for {num_tokens} tokens"
             )
+            completion_kwargs = {"engine": engine}
         elif self.config is not None and "engine" in self.config:
             print(
-                f"Using engine {self.config['engine']} for {num_tokens} tokens (approx)"
-            )
-            response = self.client.chat.completions.create(
-                engine=self.config["engine"],
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
+                f"Using engine {self.config['engine']} for {num_tokens} tokens"
             )
+            completion_kwargs = {"engine": self.config["engine"]}
         elif self.config is not None and "model" in self.config:
             print(
-                f"Using model {self.config['model']} for {num_tokens} tokens (approx)"
-            )
-            response = self.client.chat.completions.create(
-                model=self.config["model"],
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
+                f"Using model {self.config['model']} for {num_tokens} tokens"
             )
+            completion_kwargs = {"model": self.config["model"]}
         else:
             if num_tokens > 3500:
                 model = "gpt-3.5-turbo-16k"
             else:
                 model = "gpt-3.5-turbo"
 
-            print(f"Using model {model} for {num_tokens} tokens (approx)")
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=prompt,
-                stop=None,
-                temperature=self.temperature,
-            )
+            print(f"Using model {model} for {num_tokens} tokens")
+            completion_kwargs = {"model": model}
 
+        return {
+            **completion_kwargs,
+            "messages": prompt,
+            "stop": None,
+            "temperature": self.temperature,
+        }
+
+    @staticmethod
+    def _get_response_text(response) -> str:
         # Find the first response from the chatbot that has text in it (some responses may not have text)
         for choice in response.choices:
             if "text" in choice:
@@ -126,3 +130,33 @@ class OpenAI_Chat(VannaBase):
 
         # If no response with text is found, return the first response's content (which may be empty)
         return response.choices[0].message.content
+
+    def submit_prompt(self, prompt, **kwargs) -> str:
+        response = self.client.chat.completions.create(
+            **self._get_completion_kwargs(prompt, **kwargs)
+        )
+
+        return self._get_response_text(response)
+
+    def submit_prompt_stream(self, prompt, **kwargs):
+        stream = self.client.chat.completions.create(
+            **self._get_completion_kwargs(prompt, **kwargs), stream=True
+        )
+
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the response makes the server stop generating when the caller stops reading early
+            stream.close()
+
+    async def asubmit_prompt(self, prompt, **kwargs) -> str:
+        if self.async_client is None:
+            return await super().asubmit_prompt(prompt, **kwargs)
+
+        response = await self.async_client.chat.completions.create(
+            **self._get_completion_kwargs(prompt, **kwargs)
+        )
+
+        return self._get_response_text(response)
@@ -44,3 +44,8 @@ class OpenAI_Embeddings(VannaBase):
             )
 
         return embedding.get("data")[0]["embedding"]
+
+    def _embedding_model_id(self) -> str:
+        if self.config is not None and "engine" in self.config:
+            return self.config["engine"]
+        return "text-embedding-ada-002"
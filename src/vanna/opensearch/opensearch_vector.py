@@ -3,7 +3,7 @@ import uuid
 from typing import List
 
 import pandas as pd
-from opensearchpy import OpenSearch
+from opensearchpy import OpenSearch, helpers
 
 from ..base import VannaBase
 
@@ -263,6 +263,33 @@ class OpenSearch_VectorStore(VannaBase):
                                  **kwargs)
     return response['_id']
 
+  def _bulk_index(self, index: str, bodies: List[dict], suffix: str,
+                  **kwargs) -> List[str]:
+    # One bulk request instead of one index request per document
+    ids = [str(uuid.uuid4()) + suffix for _ in bodies]
+    helpers.bulk(self.client, [
+      {"_index": index, "_id": id, "_source": body}
+      for id, body in zip(ids, bodies)
+    ], **kwargs)
+    return ids
+
+  def add_ddl_batch(self, ddl_list: List[str], **kwargs) -> List[str]:
+    return self._bulk_index(self.ddl_index, [{"ddl": ddl} for ddl in ddl_list],
+                            "-ddl", **kwargs)
+
+  def add_documentation_batch(self, documentation_list: List[str],
+                              **kwargs) -> List[str]:
+    return self._bulk_index(self.document_index,
+                            [{"doc": doc} for doc in documentation_list],
+                            "-doc", **kwargs)
+
+  def add_question_sql_batch(self, question_sql_list: List[dict],
+                             **kwargs) -> List[str]:
+    return self._bulk_index(self.question_sql_index, [
+      {"question": item["question"], "sql": item["sql"]}
+      for item in question_sql_list
+    ], "-sql", **kwargs)
+
   def get_related_ddl(self, question: str, **kwargs) -> List[str]:
     # Assume you have some vector search mechanism associated with your data
     query = {
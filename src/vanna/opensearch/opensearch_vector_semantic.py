@@ -82,6 +82,25 @@ class OpenSearch_Semantic_VectorStore(VannaBase):
     self.sql_store.add_texts(texts=[question_sql_json], ids=[_id], **kwargs)
     return _id
 
+  def add_ddl_batch(self, ddl_list: list, **kwargs) -> list:
+    ids = [deterministic_uuid(ddl) + "-ddl" for ddl in ddl_list]
+    self.ddl_store.add_texts(texts=ddl_list, ids=ids, **kwargs)
+    return ids
+
+  def add_documentation_batch(self, documentation_list: list, **kwargs) -> list:
+    ids = [deterministic_uuid(documentation) + "-doc" for documentation in documentation_list]
+    self.documentation_store.add_texts(texts=documentation_list, ids=ids, **kwargs)
+    return ids
+
+  def add_question_sql_batch(self, question_sql_list: list, **kwargs) -> list:
+    texts = [
+      json.dumps({"question": item["question"], "sql": item["sql"]}, ensure_ascii=False)
+      for item in question_sql_list
+    ]
+    ids = [deterministic_uuid(text) + "-sql" for text in texts]
+    self.sql_store.add_texts(texts=texts, ids=ids, **kwargs)
+    return ids
+
   def get_related_ddl(self, question: str, **kwargs) -> list:
     documents = self.ddl_store.similarity_search(query=question, k=self.n_results_ddl)
     return [document.page_content for document in documents]
@@ -10,6 +10,7 @@ from sqlalchemy import create_engine, text
 
 from .. import ValidationError
 from ..base import VannaBase
+from ..base.embedding_cache import embedding_model_id
 from ..types import TrainingPlan, TrainingPlanItem
 
 
@@ -83,6 +84,35 @@ class PG_VectorStore(VannaBase):
         self.documentation_collection.add_documents([doc], ids=[doc.metadata["id"]])
         return _id
 
+    def add_question_sql_batch(self, question_sql_list: list, **kwargs) -> list:
+        createdat = kwargs.get("createdat")
+        docs = [
+            Document(
+                page_content=json.dumps({"question": item["question"], "sql": item["sql"]}, ensure_ascii=False),
+                metadata={"id": str(uuid.uuid4()) + "-sql", "createdat": createdat},
+            )
+            for item in question_sql_list
+        ]
+        return self._add_documents_batch(self.sql_collection, docs)
+
+    def add_ddl_batch(self, ddl_list: list, **kwargs) -> list:
+        docs = [Document(page_content=ddl, metadata={"id": str(uuid.uuid4()) + "-ddl"}) for ddl in ddl_list]
+        return self._add_documents_batch(self.ddl_collection, docs)
+
+    def add_documentation_batch(self, documentation_list: list, **kwargs) -> list:
+        docs = [
+            Document(page_content=documentation, metadata={"id": str(uuid.uuid4()) + "-doc"})
+            for documentation in documentation_list
+        ]
+        return self._add_documents_batch(self.documentation_collection, docs)
+
+    def _add_documents_batch(self, collection, docs: list) -> list:
+        # PGVector embeds all documents with one embed_documents call and inserts them in one transaction
+        ids = [doc.metadata["id"] for doc in docs]
+        if docs:
+            collection.add_documents(docs, ids=ids)
+        return ids
+
     def get_collection(self, collection_name):
         match collection_name:
             case "sql":
@@ -130,13 +160,15 @@ class PG_VectorStore(VannaBase):
             return self.add_ddl(ddl)
 
         if plan:
-            for item in plan._plan:
-                if item.item_type == TrainingPlanItem.ITEM_TYPE_DDL:
-                    self.add_ddl(item.item_value)
-                elif item.item_type == TrainingPlanItem.ITEM_TYPE_IS:
-                    self.add_documentation(item.item_value)
-                elif item.item_type == TrainingPlanItem.ITEM_TYPE_SQL and item.item_name:
-                    self.add_question_sql(question=item.item_name, sql=item.item_value)
+            self.train_many(
+                TrainingPlan(
+                    [
+                        item
+                        for item in plan._plan
+                        if item.item_type != TrainingPlanItem.ITEM_TYPE_SQL or item.item_name
+                    ]
+                )
+            )
 
     def get_training_data(self, **kwargs) -> pd.DataFrame:
         # Establishing the connection
@@ -251,3 +283,6 @@ class PG_VectorStore(VannaBase):
 
     def generate_embedding(self, *args, **kwargs):
         pass
+
+    def _embedding_model_id(self) -> str:
+        return embedding_model_id(self.embedding_function)
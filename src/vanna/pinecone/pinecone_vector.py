@@ -273,3 +273,6 @@ class PineconeDB_VectorStore(VannaBase):
         embedding_model = TextEmbedding(model_name=self.fastembed_model)
         embedding = next(embedding_model.embed(data))
         return embedding.tolist()
+
+    def _embedding_model_id(self) -> str:
+        return self.fastembed_model
@@ -140,6 +140,34 @@ class Qdrant_VectorStore(VannaBase):
 
         return self._format_point_id(id, self.documentation_collection_name)
 
+    def _upsert_batch(self, collection_name: str, texts: List[str], payloads: List[dict]) -> List[str]:
+        ids = [deterministic_uuid(text) for text in texts]
+        self._client.upsert(
+            collection_name,
+            points=[
+                models.PointStruct(id=id, vector=vector, payload=payload)
+                for id, vector, payload in zip(ids, self.generate_embeddings(texts), payloads)
+            ],
+        )
+        return [self._format_point_id(id, collection_name) for id in ids]
+
+    def add_question_sql_batch(self, question_sql_list: List[dict], **kwargs) -> List[str]:
+        return self._upsert_batch(
+            self.sql_collection_name,
+            ["Question: {0}\n\nSQL: {1}".format(item["question"], item["sql"]) for item in question_sql_list],
+            [{"question": item["question"], "sql": item["sql"]} for item in question_sql_list],
+        )
+
+    def add_ddl_batch(self, ddl_list: List[str], **kwargs) -> List[str]:
+        return self._upsert_batch(self.ddl_collection_name, ddl_list, [{"ddl": ddl} for ddl in ddl_list])
+
+    def add_documentation_batch(self, documentation_list: List[str], **kwargs) -> List[str]:
+        return self._upsert_batch(
+            self.documentation_collection_name,
+            documentation_list,
+            [{"documentation": documentation} for documentation in documentation_list],
+        )
+
     def get_training_data(self, **kwargs) -> pd.DataFrame:
         df = pd.DataFrame()
 
@@ -270,6 +298,15 @@ class Qdrant_VectorStore(VannaBase):
 
         return embedding.tolist()
 
+    def generate_embeddings(self, data: List[str], **kwargs) -> List[List[float]]:
+        embedding_model = self._client._get_or_init_model(
+            model_name=self.fastembed_model
+        )
+        return [embedding.tolist() for embedding in embedding_model.embed(data)]
+
+    def _embedding_model_id(self) -> str:
+        return self.fastembed_model
+
     def _get_all_points(self, collection_name: str):
         results: List[models.Record] = []
         next_offset = None
@@ -34,3 +34,8 @@ class Qianfan_Embeddings(VannaBase):
       )
 
     return embedding.get("data")[0]["embedding"]
+
+  def _embedding_model_id(self) -> str:
+    if self.config is not None and "model" in self.config:
+      return self.config["model"]
+    return "bge-large-zh"
@@ -1,6 +1,8 @@
 import hashlib
+import importlib
 import os
 import re
+import types
 import uuid
 from typing import Union
 
@@ -75,3 +77,21 @@ def deterministic_uuid(content: Union[str, bytes]) -> str:
     content_uuid = str(uuid.uuid5(namespace, hash_hex))
 
     return content_uuid
+
+
+class LazyModule(types.ModuleType):
+    """
+    A stand-in for a module that imports it on first attribute access, so heavy dependencies don't slow down
+    `import vanna`.
+
+    **Example:**
+    ```python
+    pd = LazyModule("pandas")
+    ```
+    """
+
+    def __getattr__(self, name: str):
+        module = importlib.import_module(self.__name__)
+        # Later lookups find the module's attributes without going through __getattr__
+        self.__dict__.update(module.__dict__)
+        return getattr(module, name)
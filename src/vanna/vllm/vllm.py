@@ -1,8 +1,10 @@
+import json
 import re
 
 import requests
 
 from ..base import VannaBase
+from ..exceptions import DependencyError
 
 
 class Vllm(VannaBase):
@@ -28,6 +30,28 @@ class Vllm(VannaBase):
             # default temperature - can be overrided using config
             self.temperature = 0.7
 
+        # The context length of the served model, looked up from the server when not set
+        self.max_model_len = config.get("max_model_len", None)
+
+    def get_prompt_token_budget(self) -> int:
+        if self.max_model_len is None:
+            try:
+                headers = {'Authorization': f'Bearer {self.auth_key}'} if self.auth_key is not None else {}
+                models = requests.get(f"{self.host}/v1/models", headers=headers, timeout=10).json()["data"]
+                self.max_model_len = next(
+                    model["max_model_len"] for model in models if model["id"] == self.model
+                )
+            except Exception as e:
+                self.log(title="vLLM Context Length", message=f"Could not get max_model_len from the server: {e}")
+                self.max_model_len = 0
+
+        budget = super().get_prompt_token_budget()
+        if self.max_model_len > 0:
+            config = getattr(self, "config", None) or {}
+            budget = min(budget, self.max_model_len - config.get("max_response_tokens", 1024))
+
+        return budget
+
     def system_message(self, message: str) -> any:
         return {"role": "system", "content": message}
 
@@ -70,6 +94,28 @@ class Vllm(VannaBase):
 
         return self.extract_sql_query(sql)
 
+    def generate_sql_stream(self, question: str, **kwargs):
+        for event in super().generate_sql_stream(question, **kwargs):
+            if event["type"] == "sql":
+                # Replace "\_" with "_"
+                sql = event["text"].replace("\\_", "_")
+
+                sql = sql.replace("\\", "")
+
+                event = {**event, "text": self.extract_sql_query(sql)}
+
+            yield event
+
+    async def agenerate_sql(self, question: str, **kwargs) -> str:
+        sql = await super().agenerate_sql(question, **kwargs)
+
+        # Replace "\_" with "_"
+        sql = sql.replace("\\_", "_")
+
+        sql = sql.replace("\\", "")
+
+        return self.extract_sql_query(sql)
+
     def submit_prompt(self, prompt, **kwargs) -> str:
         url = f"{self.host}/v1/chat/completions"
         data = {
@@ -96,3 +142,68 @@ class Vllm(VannaBase):
         self.log(response.text)
 
         return response_dict['choices'][0]['message']['content']
+
+    def submit_prompt_stream(self, prompt, **kwargs):
+        url = f"{self.host}/v1/chat/completions"
+        data = {
+            "model": self.model,
+            "temperature": self.temperature,
+            "stream": True,
+            "messages": prompt,
+        }
+
+        headers = {'Content-Type': 'application/json'}
+        if self.auth_key is not None:
+            headers['Authorization'] = f'Bearer {self.auth_key}'
+
+        response = requests.post(url, headers=headers, json=data, stream=True)
+
+        try:
+            response.raise_for_status()
+
+            # The response is a stream of server-sent events with OpenAI-style chunks
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+
+                choices = json.loads(payload).get("choices") or [{}]
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    yield content
+        finally:
+            # Closing the connection makes vLLM abort the request when the caller stops reading early
+            response.close()
+
+    async def asubmit_prompt(self, prompt, **kwargs) -> str:
+        try:
+            import httpx
+        except ImportError:
+            raise DependencyError(
+                "You need to install required dependencies to execute this method, run command:"
+                " \npip install httpx"
+            )
+
+        url = f"{self.host}/v1/chat/completions"
+        data = {
+            "model": self.model,
+            "temperature": self.temperature,
+            "stream": False,
+            "messages": prompt,
+        }
+
+        headers = {'Content-Type': 'application/json'}
+        if self.auth_key is not None:
+            headers['Authorization'] = f'Bearer {self.auth_key}'
+
+        async with httpx.AsyncClient(timeout=None) as client:
+            response = await client.post(url, headers=headers, json=data)
+
+        response_dict = response.json()
+
+        self.log(response.text)
+
+        return response_dict['choices'][0]['message']['content']
@@ -89,6 +89,9 @@ class WeaviateDatabase(VannaBase):
             embedding = next(embedding_model.embed(data))
             return embedding.tolist()
 
+    def _embedding_model_id(self) -> str:
+        return self.fastembed_model
+
 
     def _insert_data(self, cluster_key: str, data_object: dict, vector: list) -> str:
         self.weaviate_client.connect()
@@ -0,0 +1,823 @@
+import threading
+import time
+
+from vanna.base import VannaBase
+from vanna.base.tokenizer import Tokenizer
+from vanna.mock import MockEmbedding, MockLLM, MockVectorDB
+
+
+class MockVanna(MockEmbedding, MockVectorDB, MockLLM):
+    def __init__(self, config=None):
+        VannaBase.__init__(self, config=config)
+        self.embedding_calls = 0
+        self._calls_lock = threading.Lock()
+
+    def log(self, message: str, title: str = "Info"):
+        pass
+
+    def generate_embedding(self, data: str, **kwargs):
+        with self._calls_lock:
+            self.embedding_calls += 1
+        time.sleep(0.01)
+        return super().generate_embedding(data, **kwargs)
+
+    def get_similar_question_sql(self, question: str, **kwargs) -> list:
+        self.generate_embedding(question)
+        return [{"question": "How many customers are there?", "sql": "SELECT COUNT(*) FROM customers;"}]
+
+    def get_related_ddl(self, question: str, **kwargs) -> list:
+        self.generate_embedding(question)
+        return ["CREATE TABLE customers (id INT, name TEXT)"]
+
+    def get_related_documentation(self, question: str, **kwargs) -> list:
+        self.generate_embedding(question)
+        return ["Customers are people who bought something."]
+
+
+def test_get_related_context_embeds_once():
+    vn = MockVanna()
+
+    question_sql_list, ddl_list, doc_list = vn.get_related_context("How many customers are there?")
+
+    assert vn.embedding_calls == 1
+    assert len(question_sql_list) == 1 and len(ddl_list) == 1 and len(doc_list) == 1
+    assert set(vn.retrieval_timings) == {"question_sql", "ddl", "documentation"}
+
+
+def test_get_related_context_parallel_embeds_once():
+    vn = MockVanna(config={"parallel_retrieval": True})
+
+    vn.get_related_context("How many customers are there?")
+
+    assert vn.embedding_calls == 1
+
+
+def test_generate_embedding_outside_retrieval_is_not_shared():
+    vn = MockVanna()
+
+    vn.generate_embedding("a")
+    vn.generate_embedding("a")
+
+    assert vn.embedding_calls == 2
+
+
+def test_embedding_cache_skips_repeated_embeddings(tmp_path):
+    from vanna.base.embedding_cache import MemoryEmbeddingCache, SQLiteEmbeddingCache
+
+    vn = MockVanna(config={"embedding_cache": MemoryEmbeddingCache(max_size=1)})
+    vn.get_related_context("a")
+    vn.get_related_context("a")
+    vn.generate_embedding("b")
+    vn.generate_embedding("a")
+
+    assert vn.embedding_calls == 3
+    assert len(vn.config["embedding_cache"]) == 1
+
+    path = str(tmp_path / "embeddings.sqlite")
+    vn = MockVanna(config={"embedding_cache": SQLiteEmbeddingCache(path=path)})
+    vn.generate_embedding("a")
+    vn = MockVanna(config={"embedding_cache": SQLiteEmbeddingCache(path=path)})
+
+    assert vn.generate_embedding("a") == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert vn.embedding_calls == 0
+
+
+def test_embedding_cache_keys_include_the_backend_model():
+    from vanna.base.embedding_cache import MemoryEmbeddingCache
+
+    class ModelVanna(MockVanna):
+        def _embedding_model_id(self) -> str:
+            return self.config.get("fastembed_model", "small")
+
+    cache = MemoryEmbeddingCache()
+    ModelVanna(config={"embedding_cache": cache}).generate_embedding("a")
+
+    # Another model of the backend doesn't get the embeddings of the first
+    vn = ModelVanna(config={"embedding_cache": cache, "fastembed_model": "large"})
+    vn.generate_embedding("a")
+    vn.generate_embeddings(["a"])
+    assert vn.embedding_calls == 1
+
+    # embedding_model overrides the model of the backend
+    vn = ModelVanna(config={"embedding_cache": cache, "fastembed_model": "large", "embedding_model": "small"})
+    vn.generate_embedding("a")
+    assert vn.embedding_calls == 0
+
+
+def test_sqlite_embedding_cache_evicts_least_recently_used(tmp_path):
+    from vanna.base.embedding_cache import SQLiteEmbeddingCache
+
+    cache = SQLiteEmbeddingCache(path=str(tmp_path / "embeddings.sqlite"), max_size=1, max_rows=2)
+    cache.set("a", [1.0])
+    cache.set("b", [2.0])
+    cache.memory.clear()
+    assert cache.get("a") == [1.0]
+    cache.set("c", [3.0])
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    cache.memory.clear()
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+
+    # Replacing an embedding changes the totals in place, and the totals are read back from the file
+    cache.set("a", [1.0, 1.0])
+    reopened = SQLiteEmbeddingCache(path=str(tmp_path / "embeddings.sqlite"), max_rows=2)
+    assert len(reopened) == 2
+    assert reopened.conn.execute("SELECT n_bytes FROM embeddings_totals").fetchone()[0] == 24
+
+    # Files written before the totals existed are counted when they are opened
+    reopened.conn.execute("DROP TABLE embeddings_totals")
+    reopened.conn.commit()
+    assert len(SQLiteEmbeddingCache(path=str(tmp_path / "embeddings.sqlite"))) == 2
+
+    # A forked process opens its own connection
+    conn = cache.conn
+    cache._pid = -1
+    assert cache.conn is not conn
+    assert cache.get("c") == [3.0]
+
+
+def test_sql_cache_skips_llm_until_schema_changes():
+    from vanna.base.sql_cache import SemanticSQLCache
+
+    class CountingVanna(MockVanna):
+        llm_calls = 0
+
+        def submit_prompt(self, prompt, **kwargs) -> str:
+            self.llm_calls += 1
+            return "SELECT COUNT(*) FROM customers;"
+
+        def add_ddl(self, ddl: str, **kwargs) -> str:
+            return "1-ddl"
+
+    sql_cache = SemanticSQLCache(similarity_threshold=0.99)
+    vn = CountingVanna(config={"sql_cache": sql_cache})
+
+    assert vn.generate_sql("How many customers are there?") == "SELECT COUNT(*) FROM customers;"
+    # The mock embedding is constant, so a different question is a semantic hit
+    assert vn.generate_sql("  how many CUSTOMERS are there? ") == "SELECT COUNT(*) FROM customers;"
+    assert vn.generate_sql("Count the customers") == "SELECT COUNT(*) FROM customers;"
+    assert vn.llm_calls == 1
+    assert (sql_cache.hits, sql_cache.misses) == (2, 1)
+
+    vn.add_ddl("CREATE TABLE orders (id INT)")
+    vn.generate_sql("How many customers are there?")
+
+    assert vn.llm_calls == 2
+    assert sql_cache.invalidations == 1
+
+
+def test_async_api():
+    import asyncio
+
+    import pandas as pd
+
+    class AsyncVanna(MockVanna):
+        async def asubmit_prompt(self, prompt, **kwargs) -> str:
+            await asyncio.sleep(0)
+            return "SELECT COUNT(*) FROM customers;"
+
+    vn = AsyncVanna()
+    vn.run_sql = lambda sql: pd.DataFrame({"count": [3]})
+    vn.run_sql_is_set = True
+
+    async def ask_many():
+        return await asyncio.gather(
+            *[vn.aask(f"Question {i}", auto_train=False, visualize=False) for i in range(5)]
+        )
+
+    results = asyncio.run(ask_many())
+
+    assert len(results) == 5
+    for sql, df, fig in results:
+        assert sql == "SELECT COUNT(*) FROM customers;"
+        assert df["count"][0] == 3
+        assert fig is None
+
+
+def test_sql_generation_entry_points_agree_on_intermediate_sql():
+    import asyncio
+
+    import pandas as pd
+
+    class IntermediateVanna(MockVanna):
+        def submit_prompt(self, prompt, **kwargs) -> str:
+            if "results of the intermediate SQL query" in str(prompt):
+                return "SELECT COUNT(*) FROM customers WHERE region = 'EU';"
+            return "-- intermediate_sql\nSELECT DISTINCT region FROM customers;"
+
+    vn = IntermediateVanna()
+    ran = []
+    vn.run_sql = lambda sql: ran.append(sql) or pd.DataFrame({"region": ["EU", "US"]})
+    vn.run_sql_is_set = True
+
+    expected = "SELECT COUNT(*) FROM customers WHERE region = 'EU';"
+    assert vn.generate_sql("EU customers?", allow_llm_to_see_data=True) == expected
+    events = list(vn.generate_sql_stream("EU customers?", allow_llm_to_see_data=True))
+    assert [event["text"] for event in events if event["type"] != "token"] == [
+        "SELECT DISTINCT region FROM customers;",
+        expected,
+    ]
+    assert asyncio.run(vn.agenerate_sql("EU customers?", allow_llm_to_see_data=True)) == expected
+    assert ran == ["SELECT DISTINCT region FROM customers;"] * 3
+
+    refusals = {
+        vn.generate_sql("EU customers?"),
+        list(vn.generate_sql_stream("EU customers?"))[-1]["text"],
+        asyncio.run(vn.agenerate_sql("EU customers?")),
+    }
+    assert len(refusals) == 1 and "allow_llm_to_see_data=True" in refusals.pop()
+
+
+def test_connection_pool_reuses_and_replaces_connections():
+    from vanna.base.connection_pool import ConnectionPool
+
+    class Connection:
+        def __init__(self):
+            self.healthy = True
+            self.closed = False
+
+        def close(self):
+            self.closed = True
+
+    opened = []
+
+    def connect():
+        opened.append(Connection())
+        return opened[-1]
+
+    pool = ConnectionPool(connect, min_size=1, max_size=2, is_healthy=lambda conn: conn.healthy, timeout=0.1)
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+
+    second = pool.acquire()
+    try:
+        pool.acquire()
+        assert False, "the pool should be exhausted"
+    except TimeoutError:
+        pass
+
+    first.healthy = False
+    pool.release(first)
+    pool.release(second, discard=True)
+
+    replacement = pool.acquire()
+    assert replacement is not first and replacement is not second
+    assert first.closed and second.closed
+    assert len(opened) == 3
+
+
+def test_run_sql_respects_row_and_byte_limits(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "numbers.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE numbers (n INTEGER)")
+    conn.executemany("INSERT INTO numbers VALUES (?)", [(i,) for i in range(1000)])
+    conn.commit()
+    conn.close()
+
+    vn = MockVanna(config={"max_rows": 250, "fetch_batch_size": 100})
+    vn.connect_to_sqlite(path)
+    df = vn.run_sql("SELECT * FROM numbers")
+    assert len(df) == 250
+    assert df.attrs["truncated"]
+
+    df = vn.run_sql("SELECT * FROM numbers LIMIT 10")
+    assert len(df) == 10
+    assert not df.attrs["truncated"]
+
+    vn = MockVanna(config={"max_bytes": 1, "fetch_batch_size": 100})
+    vn.connect_to_sqlite(path)
+    df = vn.run_sql("SELECT * FROM numbers")
+    assert len(df) == 100
+    assert df.attrs["truncated"]
+
+    # Reaching the byte limit with the last row is not a truncation
+    df = vn.run_sql("SELECT * FROM numbers LIMIT 100")
+    assert len(df) == 100
+    assert not df.attrs["truncated"]
+
+    cursor = sqlite3.connect(path).execute("SELECT * FROM numbers")
+    vn = MockVanna(config={"max_rows": 5})
+    df = vn._fetch_dataframe(cursor)
+    assert list(df["n"]) == [0, 1, 2, 3, 4]
+
+
+def test_run_sql_arrow_duckdb():
+    import pytest
+
+    pytest.importorskip("duckdb")
+    pytest.importorskip("pyarrow")
+
+    vn = MockVanna(config={"fetch_batch_size": 100})
+    vn.connect_to_duckdb(":memory:", init_sql="CREATE TABLE numbers AS SELECT range AS n FROM range(1000)")
+    table = vn.run_sql_arrow("SELECT * FROM numbers")
+    assert table.num_rows == 1000
+    assert not vn.arrow_table_is_truncated(table)
+
+    vn.config["max_rows"] = 250
+    table = vn.run_sql_arrow("SELECT * FROM numbers ORDER BY n")
+    assert table.num_rows == 250
+    assert table.column("n").to_pylist()[-1] == 249
+    assert vn.arrow_table_is_truncated(table)
+
+    table = vn.run_sql_arrow("SELECT * FROM numbers WHERE n < 0")
+    assert table.num_rows == 0
+    assert table.column_names == ["n"]
+
+
+def test_run_sql_chunks():
+    import pandas as pd
+    import pytest
+
+    pytest.importorskip("duckdb")
+
+    vn = MockVanna(config={"max_rows": 10})
+    vn.connect_to_duckdb(":memory:", init_sql="CREATE TABLE numbers AS SELECT range AS n FROM range(1000)")
+    chunks = list(vn.run_sql_chunks("SELECT * FROM numbers ORDER BY n", chunk_rows=300))
+    assert [len(chunk) for chunk in chunks] == [300, 300, 300, 100]
+    assert chunks[-1]["n"].iloc[-1] == 999
+
+    chunks = vn.run_sql_chunks("SELECT * FROM numbers", chunk_rows=300)
+    next(chunks)
+    chunks.close()
+
+    chunks = list(vn.run_sql_chunks("SELECT * FROM numbers WHERE n < 0"))
+    assert len(chunks) == 1 and len(chunks[0]) == 0
+    assert list(chunks[0].columns) == ["n"]
+
+    # Other databases split the result of run_sql
+    vn.run_sql = lambda sql: pd.DataFrame({"n": range(5)})
+    assert [len(chunk) for chunk in VannaBase.run_sql_chunks(vn, "SELECT n", chunk_rows=2)] == [2, 2, 1]
+
+
+def test_train_many_uses_batches_and_embedding_cache():
+    from vanna.base.embedding_cache import MemoryEmbeddingCache
+    from vanna.types import TrainingPlan, TrainingPlanItem
+
+    class BatchVanna(MockVanna):
+        def generate_embeddings(self, data, **kwargs):
+            self.batch_sizes.append(len(data))
+            return [[float(len(text))] for text in data]
+
+        def add_ddl_batch(self, ddl_list, **kwargs):
+            self.generate_embeddings(ddl_list)
+            return [f"{i}-ddl" for i, _ in enumerate(ddl_list)]
+
+    vn = BatchVanna(config={"embedding_cache": MemoryEmbeddingCache()})
+    vn.batch_sizes = []
+
+    plan = TrainingPlan(
+        [
+            TrainingPlanItem(
+                item_type=TrainingPlanItem.ITEM_TYPE_DDL,
+                item_group="",
+                item_name=f"t{i}",
+                item_value=f"CREATE TABLE t{i} (id INT)",
+            )
+            for i in range(25)
+        ]
+        + [
+            TrainingPlanItem(
+                item_type=TrainingPlanItem.ITEM_TYPE_SQL,
+                item_group="",
+                item_name="How many?",
+                item_value="SELECT COUNT(*) FROM t0",
+            )
+        ]
+    )
+    progress = []
+    ids = vn.train_many(plan, batch_size=10, progress=lambda done, total: progress.append((done, total)))
+
+    assert len(ids) == 26
+    assert vn.batch_sizes == [10, 10, 5]
+    assert progress == [(10, 26), (20, 26), (26, 26)]
+
+    assert vn.generate_embeddings(["CREATE TABLE t0 (id INT)", "new"]) == [[24.0], [3.0]]
+    assert vn.batch_sizes[-1] == 1
+
+
+def test_training_plan_generic_groups_tables_in_order():
+    import pandas as pd
+
+    df = pd.DataFrame(
+        {
+            "TABLE_CATALOG": ["db1", "db2", "db1", "db1", "db2"],
+            "TABLE_SCHEMA": ["s1", "s1", "s2", "s1", "s1"],
+            "TABLE_NAME": ["a", "c", "b", "a2", "c"],
+            "COLUMN_NAME": ["id", "id", "id", "id", "name"],
+            "DATA_TYPE": ["int", "int", "int", "int", "text"],
+        }
+    )
+    vn = MockVanna()
+
+    plan = vn.get_training_plan_generic(df)
+
+    assert [(item.item_group, item.item_name) for item in plan._plan] == [
+        ("db1.s1", "a"),
+        ("db1.s1", "a2"),
+        ("db1.s2", "b"),
+        ("db2.s1", "c"),
+    ]
+    assert plan._plan[3].item_value.startswith("The following columns are in the c table in the db2 database:")
+    assert "| name " in plan._plan[3].item_value
+
+    items = vn.iter_training_plan_generic(df)
+    assert next(items).item_name == "a"
+    progress = []
+    vn.train_many(items, batch_size=2, progress=lambda done, total: progress.append((done, total)))
+    assert progress == [(2, None), (3, None)]
+
+
+def test_sync_schema_only_embeds_changed_tables(tmp_path):
+    import pandas as pd
+
+    class RecordingVanna(MockVanna):
+        def add_documentation_batch(self, documentation_list, **kwargs):
+            self.added += documentation_list
+            return [f"{len(self.added) - len(documentation_list) + i}-doc" for i in range(len(documentation_list))]
+
+        def remove_training_data_batch(self, ids, **kwargs):
+            self.removed += ids
+            return len(ids)
+
+    def columns(tables):
+        return pd.DataFrame(
+            [
+                {"TABLE_CATALOG": "db", "TABLE_SCHEMA": "s", "TABLE_NAME": table, "COLUMN_NAME": column, "DATA_TYPE": "int"}
+                for table, table_columns in tables.items()
+                for column in table_columns
+            ]
+        )
+
+    vn = RecordingVanna()
+    vn.added, vn.removed = [], []
+    manifest_path = str(tmp_path / "manifest.json")
+
+    counts = vn.sync_schema(columns({"a": ["id"], "b": ["id"], "c": ["id"]}), manifest_path=manifest_path)
+    assert counts == {"added": 3, "changed": 0, "removed": 0, "unchanged": 0}
+
+    vn.added = []
+    # A new table before "b" shifts the positions of the rows that follow it
+    counts = vn.sync_schema(columns({"a": ["id"], "new": ["id"], "b": ["id", "name"]}), manifest_path=manifest_path)
+
+    assert counts == {"added": 1, "changed": 1, "removed": 1, "unchanged": 1}
+    assert [doc.split(" table")[0] for doc in vn.added] == [
+        "The following columns are in the new",
+        "The following columns are in the b",
+    ]
+    assert sorted(vn.removed) == ["1-doc", "2-doc"]
+
+    vn.added = []
+    assert vn.sync_schema(columns({"a": ["id"], "new": ["id"], "b": ["id", "name"]}), manifest_path=manifest_path)["unchanged"] == 3
+    assert vn.added == []
+
+
+def test_sync_schema_retries_removal_after_failure(tmp_path):
+    import pandas as pd
+
+    class FailingVanna(MockVanna):
+        fail = False
+
+        def add_documentation_batch(self, documentation_list, **kwargs):
+            self.stored += documentation_list
+            return documentation_list
+
+        def remove_training_data_batch(self, ids, **kwargs):
+            if self.fail:
+                raise ConnectionError("vector store unavailable")
+            for id in ids:
+                self.stored.remove(id)
+            return len(ids)
+
+    def columns(tables):
+        return pd.DataFrame(
+            [
+                {"TABLE_CATALOG": "db", "TABLE_SCHEMA": "s", "TABLE_NAME": table, "COLUMN_NAME": column, "DATA_TYPE": "int"}
+                for table, table_columns in tables.items()
+                for column in table_columns
+            ]
+        )
+
+    vn = FailingVanna()
+    vn.stored = []
+    manifest_path = str(tmp_path / "manifest.json")
+    vn.sync_schema(columns({"a": ["id"], "b": ["id"]}), manifest_path=manifest_path)
+
+    vn.fail = True
+    changed = columns({"a": ["id", "name"]})
+    try:
+        vn.sync_schema(changed, manifest_path=manifest_path)
+        assert False, "the removal should have failed"
+    except ConnectionError:
+        pass
+    assert len(vn.stored) == 2
+
+    vn.fail = False
+    counts = vn.sync_schema(changed, manifest_path=manifest_path)
+    assert counts == {"added": 0, "changed": 1, "removed": 1, "unchanged": 0}
+    assert len(vn.stored) == 1
+    assert "name" in vn.stored[0]
+
+
+def test_pack_prompt_context_packs_by_rank_within_budget():
+    class WordTokenizer(Tokenizer):
+        def count(self, text):
+            return len(text.split())
+
+    vn = MockVanna(config={"tokenizer": WordTokenizer(), "context_window": 1100, "max_response_tokens": 1000})
+    assert vn.str_to_approx_token_count("one two three") == 3
+    assert vn.get_prompt_token_budget() == 100
+
+    question_sql_list, ddl_list, doc_list = vn.pack_prompt_context(
+        "question",
+        ddl_list=["ddl0 " * 4, "ddl1 " * 4, "ddl2 " * 4],
+        doc_list=["doc0 " * 4, "doc1 " * 4],
+        question_sql_list=[{"question": "q0", "sql": "s0 " * 3}, {"question": "q1", "sql": "s1 " * 3}],
+        max_tokens=14,
+    )
+
+    # The best of each kind of context is packed before the second best of any of them
+    assert len(question_sql_list) == 1 and question_sql_list[0]["question"] == "q0"
+    assert ddl_list == ["ddl0 " * 4]
+    assert doc_list == ["doc0 " * 4]
+
+
+def test_schema_pruning_keeps_related_columns_and_join_paths():
+    import pandas as pd
+
+    customer_columns = ["id INT PRIMARY KEY", "region TEXT"] + [f"attribute_{i} TEXT" for i in range(10)]
+    ddl = {
+        "customers": f"CREATE TABLE customers ({', '.join(customer_columns)})",
+        "orders": "CREATE TABLE orders (id INT PRIMARY KEY, customer_id INT REFERENCES customers(id), product_id INT, "
+        "placed_at DATE, FOREIGN KEY (product_id) REFERENCES products (id))",
+        "products": "CREATE TABLE products (id INT PRIMARY KEY, name TEXT, price DECIMAL(10, 2))",
+    }
+
+    class SchemaVanna(MockVanna):
+        def get_related_ddl(self, question: str, **kwargs) -> list:
+            self.generate_embedding(question)
+            return [ddl["customers"], ddl["products"], "ALTER TABLE products OWNER TO admin"]
+
+        def get_training_data(self, **kwargs):
+            return pd.DataFrame({"training_data_type": "ddl", "content": list(ddl.values())})
+
+    vn = SchemaVanna(config={"schema_pruning": True, "schema_pruning_columns": 3})
+
+    _, ddl_list, _ = vn.get_related_context("Product sales by customer region")
+
+    assert ddl_list[0] == (
+        "CREATE TABLE customers (\n  id INT PRIMARY KEY,\n  region TEXT,\n  attribute_0 TEXT\n  -- 9 more columns not shown\n)"
+    )
+    assert ddl_list[1] == ddl["products"]
+    assert ddl_list[2] == "ALTER TABLE products OWNER TO admin"
+    # The orders table joins the retrieved tables, so its keys are added
+    assert "placed_at" not in ddl_list[3] and "FOREIGN KEY (product_id) REFERENCES products (id)" in ddl_list[3]
+    assert ddl_list[4].splitlines()[1:] == ["-- customers.id = orders.customer_id", "-- orders.product_id = products.id"]
+
+    # The column embeddings are kept with the schema graph until the DDL changes
+    vn.embedding_calls = 0
+    vn.get_related_context("Customers by region")
+    assert vn.embedding_calls == 1
+
+    vn.add_ddl(ddl["products"])
+    assert vn._schema_graph is None
+
+
+def test_schema_graph_reads_ddl_column_and_reports_missing_ddl():
+    import pandas as pd
+    import pytest
+
+    from vanna.exceptions import ValidationError
+
+    vn = MockVanna()
+    vn.get_training_data = lambda: pd.DataFrame({"training_data_type": ["ddl"], "ddl": ["CREATE TABLE a (id INT)"]})
+    assert vn.get_schema_graph().find_table("a") is not None
+
+    vn._schema_graph = None
+    vn.get_training_data = lambda: pd.DataFrame({"training_data_type": ["ddl"], "text": ["CREATE TABLE a (id INT)"]})
+    with pytest.raises(ValidationError):
+        vn.get_schema_graph()
+    assert vn._schema_graph is None
+
+
+def test_streaming_generation():
+    import pandas as pd
+
+    class StreamingVanna(MockVanna):
+        def submit_prompt_stream(self, prompt, **kwargs):
+            yield from self.chunks
+
+    vn = StreamingVanna()
+
+    vn.chunks = ["```sql\nSELECT ", "COUNT(*) FROM customers", ";\n```"]
+    events = list(vn.generate_sql_stream("How many customers are there?"))
+    assert "".join(event["text"] for event in events if event["type"] == "token") == "```sql\nSELECT COUNT(*) FROM customers;"
+    assert events[-1] == {"type": "sql", "text": "SELECT COUNT(*) FROM customers;"}
+
+    vn.chunks = ["1. What is the ", "total?\n2. Who", " bought the most?\n\n", "3. When?"]
+    questions = vn.generate_followup_questions_stream("Q", "SELECT 1", pd.DataFrame({"a": [1]}))
+    assert list(questions) == ["What is the total?", "Who bought the most?", "When?"]
+
+    # Connectors without streaming yield the whole response at once
+    assert list(MockVanna().generate_summary_stream("Q", pd.DataFrame({"a": [1]}))) == ["Mock LLM response"]
+
+
+def test_incremental_sql_extractor_stops_the_stream():
+    from vanna.base.sql_extractor import IncrementalSQLExtractor
+
+    def feed(chunks):
+        extractor = IncrementalSQLExtractor()
+        for i, chunk in enumerate(chunks):
+            if extractor.feed(chunk):
+                return extractor.sql, i
+        return None, len(chunks)
+
+    assert feed(["Here you go: SELECT name FROM t WHERE note = 'a;", " b';", " This query ..."]) == (
+        "SELECT name FROM t WHERE note = 'a; b';",
+        1,
+    )
+    assert feed(["``", "`sql\nSELECT * FROM t\n`", "``", "\nExplanation"]) == ("SELECT * FROM t", 2)
+    assert feed(["I will select the rows; then ", "WITH x AS (SELECT 1) SELECT * FROM x;"]) == (
+        "WITH x AS (SELECT 1) SELECT * FROM x;",
+        1,
+    )
+    assert feed(["No SQL; sorry."]) == (None, 1)
+
+    class StreamingVanna(MockVanna):
+        def submit_prompt_stream(self, prompt, **kwargs):
+            try:
+                yield from ["SELECT COUNT(*) FROM customers;", " This counts", " the customers."]
+            except GeneratorExit:
+                self.closed_early = True
+                raise
+
+    vn = StreamingVanna()
+    events = list(vn.generate_sql_stream("How many customers are there?"))
+
+    assert [event["type"] for event in events] == ["token", "sql"]
+    assert events[-1]["text"] == "SELECT COUNT(*) FROM customers;"
+    assert vn.closed_early
+
+
+def test_metrics_tracer_records_pipeline_stages():
+    import pandas as pd
+
+    from vanna.base.tracing import MetricsTracer
+
+    tracer = MetricsTracer()
+    vn = MockVanna(config={"tracer": tracer})
+    vn.run_sql = lambda sql: pd.DataFrame({"n": range(10)})
+
+    vn.run_sql(vn.generate_sql("How many customers are there?"))
+
+    stages = tracer.snapshot()
+    assert {"generate_embedding", "retrieval.ddl", "get_sql_prompt", "submit_prompt", "extract_sql", "run_sql"} <= set(stages)
+    assert stages["submit_prompt"]["count"] == 1 and stages["submit_prompt"]["prompt_tokens"] > 0
+    assert stages["run_sql"]["rows"] == 10 and stages["run_sql"]["bytes"] > 0
+    assert stages["retrieval.ddl"]["results"] == 1
+    assert 'vanna_stage_duration_seconds_count{stage="run_sql"} 1' in tracer.render_prometheus()
+
+
+def test_import_does_not_load_heavy_dependencies():
+    import json
+    import os
+    import subprocess
+    import sys
+
+    script = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import vanna, vanna.base\n"
+        "elapsed = time.perf_counter() - start\n"
+        "heavy = ['numpy', 'pandas', 'plotly', 'sqlparse', 'requests']\n"
+        "print(json.dumps({'elapsed': elapsed, 'loaded': [name for name in heavy if name in sys.modules]}))\n"
+    )
+
+    # Each run is a cold start, the best of a few is less sensitive to a busy machine
+    runs = [json.loads(subprocess.check_output([sys.executable, "-c", script])) for _ in range(3)]
+
+    assert all(run["loaded"] == [] for run in runs)
+
+    # The import takes about 0.1s. The generous default only catches heavy imports creeping back in, and can be
+    # raised with VANNA_IMPORT_TIME_LIMIT on slow machines, or set to 0 to skip the check
+    limit = float(os.environ.get("VANNA_IMPORT_TIME_LIMIT", "2"))
+    if limit > 0:
+        assert min(run["elapsed"] for run in runs) < limit
+
+
+def test_figure_engine_caches_figures_and_stops_runaway_code():
+    import pandas as pd
+    import pytest
+
+    from vanna.base.figure_engine import FigureEngine
+    from vanna.exceptions import ExecutionError
+
+    engine = FigureEngine(workers=1, timeout=1)
+    vn = MockVanna(config={"figure_engine": engine})
+    df = pd.DataFrame({"name": ["a", "b", "c"], "salary": [1, 2, 3]})
+    try:
+        fig = vn.get_plotly_figure("fig = px.bar(df, x='name', y='salary')", df, dark_mode=False)
+        assert fig.data[0].type == "bar" and list(fig.data[0].x) == ["a", "b", "c"]
+
+        vn.get_plotly_figure_json("fig = px.bar(df, x='name', y='salary')", df, dark_mode=False)
+        assert (engine.hits, engine.misses) == (1, 1)
+
+        with pytest.raises(ExecutionError):
+            vn.get_plotly_figure_json("while True:\n    pass", df)
+
+        # The stuck worker is replaced
+        assert vn.get_plotly_figure_json("fig = px.line(df, x='name', y='salary')", df) is not None
+
+        # Workers are not forked from the threaded process that serves the API
+        assert engine._context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        engine.close()
+
+
+def test_downsample_for_chart():
+    import numpy as np
+    import pandas as pd
+
+    vn = MockVanna(config={"chart_max_points": 500, "chart_max_categories": 5})
+    df = pd.DataFrame({"x": np.arange(20000), "y": np.sin(np.arange(20000) / 500.0)})
+    df.loc[12345, "y"] = 10.0
+
+    line, downsampling = vn.downsample_for_chart("fig = px.line(df, x='x', y='y')", df)
+    assert downsampling == {"method": "lttb", "rows": 20000, "points": 500}
+    # LTTB keeps the ends and the spike
+    assert {0, 12345, 19999} <= set(line["x"])
+
+    # 20000 points would take hundreds of kilobytes
+    assert len(vn.get_plotly_figure_json("fig = px.line(df, x='x', y='y')", df)) < 50000
+    # A dataframe that was already downsampled is charted as it is
+    assert len(vn.get_plotly_figure_json("fig = px.line(df, x='x', y='y')", df, downsample=False)) > 50000
+
+    # Unsorted rows are downsampled along x, so the line has no large gaps
+    minutes = pd.DataFrame({"t": pd.date_range("2024-01-01", periods=20000, freq="min"), "y": df["y"]})
+    shuffled = minutes.sample(frac=1, random_state=0)
+    line, _ = vn.downsample_for_chart("fig = px.line(df.sort_values('t'), x='t', y='y')", shuffled)
+    assert len(line) == 500 and line["t"].sort_values().diff().max() <= pd.Timedelta(minutes=100)
+
+    bars = pd.DataFrame({"name": list("abcdefgh"), "sales": [8, 7, 6, 5, 4, 3, 2, 1]})
+    top, downsampling = vn.downsample_for_chart("fig = px.bar(df, x='name', y='sales')", bars)
+    assert downsampling["method"] == "top_n"
+    assert list(top["name"]) == ["a", "b", "c", "d", "Other"] and top["sales"].sum() == bars["sales"].sum()
+
+
+def test_chart_planner_skips_the_llm_for_common_shapes():
+    import pandas as pd
+
+    vn = MockVanna()
+    sales = pd.DataFrame({"month": ["2024-01-01", "2024-02-01", "2024-03-01"], "sales": [10, 20, 15]})
+    plotly_code = vn.plan_plotly_code(sales, question="Monthly sales")
+    assert plotly_code.startswith("fig = px.line(") and "x='month'" in plotly_code
+    assert vn.get_plotly_figure(plotly_code, sales).data[0].type == "scatter"
+
+    assert vn.plan_plotly_code(pd.DataFrame({"region": ["a", "b"], "sales": [1, 2]})).startswith("fig = px.bar(")
+    # Two categories and a number could be charted several ways, so it is left to the LLM
+    assert vn.plan_plotly_code(pd.DataFrame({"a": ["x", "y"], "b": ["u", "v"], "n": [1, 2]})) is None
+
+    planner = vn.get_chart_planner()
+    assert (planner.planned, planner.deferred) == (2, 1)
+
+    assert MockVanna(config={"chart_planner": False}).plan_plotly_code(sales) is None
+
+    # The async API plans the chart too
+    import asyncio
+
+    vn = MockVanna()
+    vn.run_sql = lambda sql: sales
+    vn.run_sql_is_set = True
+    llm_calls = []
+    vn.generate_plotly_code = lambda **kwargs: llm_calls.append(kwargs)
+    sql, df, fig = asyncio.run(vn.aask("Monthly sales", auto_train=False))
+    assert fig.data[0].type == "scatter" and vn.get_chart_planner().planned == 1 and llm_calls == []
+
+
+def test_describe_dataframe_stays_within_the_token_budget():
+    import numpy as np
+    import pandas as pd
+
+    vn = MockVanna(config={"dataframe_prompt_tokens": 800})
+    small = pd.DataFrame({"region": ["a", "b"], "sales": [1, 2]})
+    assert vn.describe_dataframe(small) == small.to_markdown()
+
+    n = 100000
+    df = pd.DataFrame(
+        {
+            "region": np.where(np.arange(n) % 1000 == 0, "Rare", np.where(np.arange(n) % 2 == 0, "East", "West")),
+            "sales": np.arange(n, dtype=float),
+        }
+    )
+    description = vn.describe_dataframe(df)
+    assert vn.str_to_approx_token_count(description) <= 800
+    assert "100000 rows" in description and "min 0, mean 49999.5, max 99999" in description
+    # The stratified sample includes rows of the rare region
+    assert "| Rare " in description.split("A sample of")[1]
+
+    prompt = vn._get_summary_message_log("What are the sales?", df)[0]["content"]
+    assert vn.str_to_approx_token_count(prompt) < 1000
@@ -0,0 +1,93 @@
+import json
+import sqlite3
+
+from vanna.base import VannaBase
+from vanna.evaluation import evaluate, load_questions, results_match, summarize
+from vanna.mock import MockEmbedding, MockLLM, MockVectorDB
+
+
+class EvaluationVanna(MockEmbedding, MockVectorDB, MockLLM):
+    def __init__(self, config=None):
+        VannaBase.__init__(self, config={})
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+        connection.executescript("CREATE TABLE t (a INT, b TEXT); INSERT INTO t VALUES (1, 'x'), (2, 'y');")
+
+        import pandas as pd
+
+        self.run_sql = lambda sql: pd.read_sql_query(sql, connection)
+        self.run_sql_is_set = True
+
+    def log(self, message: str, title: str = "Info"):
+        pass
+
+    def submit_prompt(self, prompt, **kwargs) -> str:
+        # Answers with the right SQL for the questions that mention "b"
+        return "SELECT b, a FROM t ORDER BY a DESC;" if "b" in prompt[-1]["content"] else "SELECT a FROM t;"
+
+
+def make_vanna(dataset):
+    return EvaluationVanna()
+
+
+def test_evaluate_reports_accuracy_and_timings(tmp_path):
+    (tmp_path / "toy").mkdir()
+    (tmp_path / "toy" / "questions.json").write_text(
+        json.dumps(
+            [
+                {"question": "a and b", "answer": "SELECT a, b FROM t"},
+                {"question": "a only", "answer": "SELECT a FROM t WHERE a = 1"},
+                {"question": "broken", "answer": "SELECT nope FROM t"},
+            ]
+        )
+    )
+
+    questions = load_questions(str(tmp_path / "*" / "questions.json"))
+    assert [item["dataset"] for item in questions] == ["toy"] * 3
+
+    for use_processes in (False, True):
+        results = evaluate(make_vanna, questions, max_workers=2, use_processes=use_processes, requests_per_second=100)
+
+        assert results["correct"].tolist() == [True, False, None]
+        summary = summarize(results)
+        assert summary["accuracy"] == 0.5
+        assert summary["datasets"]["toy"]["questions"] == 3
+        assert summary["prompt_tokens"] > 0 and summary["p95_time"] >= summary["p50_time"]
+
+
+def test_retrieval_time_is_wall_time_of_parallel_lookups():
+    import time
+
+    import pandas as pd
+
+    from vanna.evaluation.evaluation import evaluate_question
+
+    class SlowRetrievalVanna(EvaluationVanna):
+        def __init__(self, config=None):
+            super().__init__()
+            self.config["parallel_retrieval"] = True
+
+        def get_related_ddl(self, question: str, **kwargs) -> list:
+            time.sleep(0.1)
+            return []
+
+        def get_related_documentation(self, question: str, **kwargs) -> list:
+            time.sleep(0.1)
+            return []
+
+        def get_similar_question_sql(self, question: str, **kwargs) -> list:
+            time.sleep(0.1)
+            return []
+
+    item = {"dataset": "slow", "question": "a only", "expected_sql": "SELECT a FROM t"}
+    result = evaluate_question(lambda dataset: SlowRetrievalVanna(), item)
+
+    assert set(result["retrieval_timings"]) == {"question_sql", "ddl", "documentation"}
+    assert 0.1 <= result["retrieval_time"] < sum(result["retrieval_timings"].values())
+    assert summarize(pd.DataFrame([result]))["mean_retrieval_timings"]["ddl"] >= 0.1
+
+
+def test_results_match_ignores_names_and_order():
+    import pandas as pd
+
+    assert results_match(pd.DataFrame({"x": [1.0, 2.0], "y": ["a", "b"]}), pd.DataFrame({"n": ["b", "a"], "m": [2, 1]}))
+    assert not results_match(pd.DataFrame({"x": [1, 2]}), pd.DataFrame({"x": [1, 3]}))
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from vanna.faiss import FAISS
+from vanna.mock import MockLLM
+
+
+class StubEmbedder:
+    """
+    Embeds text as a deterministic random vector and counts the texts it embedded.
+    """
+
+    dim = 8
+
+    def __init__(self):
+        self.texts = []
+
+    def _embed(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "big")
+        return np.random.default_rng(seed).random(self.dim, dtype=np.float32)
+
+    def encode(self, data):
+        if isinstance(data, str):
+            self.texts.append(data)
+            return self._embed(data)
+
+        self.texts.extend(data)
+        return np.array([self._embed(text) for text in data])
+
+
+class FaissVanna(FAISS, MockLLM):
+    def __init__(self, config=None):
+        FAISS.__init__(self, config=config)
+
+    def log(self, message: str, title: str = "Info"):
+        pass
+
+
+def make_vanna(path, embedder=None, **config):
+    return FaissVanna(
+        config={"path": str(path), "embedding_dim": StubEmbedder.dim, "embedding_model": embedder or StubEmbedder(), **config}
+    )
+
+
+def test_remove_keeps_other_entries_in_place(tmp_path):
+    vn = make_vanna(tmp_path)
+    ids = vn.add_ddl_batch(["CREATE TABLE a (x INT)", "CREATE TABLE b (x INT)", "CREATE TABLE c (x INT)"])
+    faiss_ids = faiss.vector_to_array(vn.ddl_index.id_map).tolist()
+    embedded = len(vn.embedding_model.texts)
+
+    assert vn.remove_training_data(ids[1])
+    assert not vn.remove_training_data(ids[1])
+
+    # The remaining vectors keep their ids and nothing is embedded again
+    assert len(vn.embedding_model.texts) == embedded
+    assert faiss.vector_to_array(vn.ddl_index.id_map).tolist() == [faiss_ids[0], faiss_ids[2]]
+    assert vn.ddl_index.ntotal == 2
+    assert vn.get_related_ddl("CREATE TABLE c (x INT)")[0] == "CREATE TABLE c (x INT)"
+    assert "CREATE TABLE b (x INT)" not in vn.get_related_ddl("CREATE TABLE b (x INT)")
+
+
+def test_remove_training_data_batch_and_reload(tmp_path):
+    vn = make_vanna(tmp_path)
+    ddl_ids = vn.add_ddl_batch(["CREATE TABLE a (x INT)", "CREATE TABLE b (x INT)"])
+    sql_id = vn.add_question_sql("How many a?", "SELECT COUNT(*) FROM a")
+    doc_ids = vn.add_documentation_batch(["a holds things", "b holds other things"])
+
+    assert vn.remove_training_data_batch([ddl_ids[0], sql_id, doc_ids[1], "missing"]) == 3
+
+    embedder = StubEmbedder()
+    reloaded = make_vanna(tmp_path, embedder)
+    training_data = reloaded.get_training_data()
+    assert sorted(training_data["id"]) == sorted([ddl_ids[1], doc_ids[0]])
+    assert reloaded.ddl_index.ntotal == 1 and reloaded.sql_index.ntotal == 0 and reloaded.doc_index.ntotal == 1
+    assert reloaded.get_related_documentation("a holds things") == ["a holds things"]
+    assert embedder.texts == ["a holds things"]
+
+
+def test_legacy_index_is_converted_without_embedding(tmp_path):
+    embedder = StubEmbedder()
+    items = [{"id": f"{i}-ddl", "ddl": f"CREATE TABLE t{i} (x INT)"} for i in range(3)]
+
+    # Earlier versions stored an IndexFlatL2 by position next to a JSON list of metadata
+    index = faiss.IndexFlatL2(StubEmbedder.dim)
+    index.add(np.array([embedder._embed(item["ddl"]) for item in items]))
+    faiss.write_index(index, str(tmp_path / "ddl_index.faiss"))
+    with open(tmp_path / "ddl_metadata.json", "w") as f:
+        json.dump(items, f)
+
+    vn = make_vanna(tmp_path, embedder)
+    assert isinstance(vn.ddl_index, faiss.IndexIDMap)
+    assert vn.get_related_ddl("CREATE TABLE t2 (x INT)")[0] == "CREATE TABLE t2 (x INT)"
+
+    assert vn.remove_training_data("1-ddl")
+    assert embedder.texts == ["CREATE TABLE t2 (x INT)"]
+    assert not os.path.exists(tmp_path / "ddl_metadata.json")
+    assert os.path.exists(tmp_path / "ddl_metadata.json.bak")
+
+    reloaded = make_vanna(tmp_path)
+    assert sorted(reloaded.get_training_data()["id"]) == ["0-ddl", "2-ddl"]
+    assert reloaded.get_related_ddl("CREATE TABLE t0 (x INT)")[0] == "CREATE TABLE t0 (x INT)"
+
+
+def test_write_behind_buffers_until_flush(tmp_path):
+    vn = make_vanna(tmp_path, write_behind=True, flush_interval=60)
+    ids = vn.add_ddl_batch(["CREATE TABLE a (x INT)", "CREATE TABLE b (x INT)"])
+    vn.add_documentation("a holds things")
+
+    assert not os.path.exists(tmp_path / "ddl_metadata.jsonl")
+    assert not os.path.exists(tmp_path / "ddl_index.faiss")
+
+    vn.flush()
+    with open(tmp_path / "ddl_metadata.jsonl") as f:
+        assert [json.loads(line)["id"] for line in f] == ids
+
+    reloaded = make_vanna(tmp_path)
+    assert reloaded.ddl_index.ntotal == 2 and reloaded.doc_index.ntotal == 1
+    assert reloaded.get_related_ddl("CREATE TABLE b (x INT)")[0] == "CREATE TABLE b (x INT)"
+
+    # Reaching flush_max_items flushes without waiting for the timer
+    vn = make_vanna(tmp_path, write_behind=True, flush_interval=60, flush_max_items=2)
+    vn.add_documentation_batch(["b holds other things", "c holds nothing"])
+    assert make_vanna(tmp_path).doc_index.ntotal == 3
+
+
+def test_write_behind_store_is_not_kept_alive_by_atexit(tmp_path):
+    import gc
+    import weakref
+
+    vn = make_vanna(tmp_path, write_behind=True)
+    ref = weakref.ref(vn)
+    del vn
+    gc.collect()
+
+    assert ref() is None
+
+
+def test_metadata_log_is_compacted(tmp_path):
+    def n_lines():
+        with open(tmp_path / "ddl_metadata.jsonl") as f:
+            return len(f.readlines())
+
+    vn = make_vanna(tmp_path, flush_max_items=1)
+    ids = vn.add_ddl_batch([f"CREATE TABLE t{i} (x INT)" for i in range(4)])
+    assert n_lines() == 4
+
+    # Appends a removal marker while the log holds at most 2 * entries + flush_max_items lines
+    vn.remove_training_data(ids[0])
+    assert n_lines() == 5
+
+    # 6 lines for 2 entries is over the limit, so only the entries are kept
+    vn.remove_training_data(ids[1])
+    assert n_lines() == 2
+
+    assert sorted(make_vanna(tmp_path).get_training_data()["id"]) == sorted(ids[2:])
+
+
+def test_interrupted_metadata_log_is_read_back(tmp_path):
+    vn = make_vanna(tmp_path)
+    ids = vn.add_ddl_batch(["CREATE TABLE a (x INT)", "CREATE TABLE b (x INT)"])
+
+    # A crash while appending leaves half a line at the end of the log
+    with open(tmp_path / "ddl_metadata.jsonl", "a") as f:
+        f.write('{"id": "c", "ddl": "CREATE TA')
+
+    vn = make_vanna(tmp_path)
+    assert sorted(vn.get_training_data()["id"]) == sorted(ids)
+
+    # The next change rewrites the log instead of appending to the broken line
+    new_id = vn.add_ddl("CREATE TABLE c (x INT)")
+    with open(tmp_path / "ddl_metadata.jsonl") as f:
+        assert all(line.endswith("\n") for line in f)
+    assert sorted(make_vanna(tmp_path).get_training_data()["id"]) == sorted(ids + [new_id])
+
+
+def test_training_data_content_feeds_the_schema_graph(tmp_path):
+    vn = make_vanna(tmp_path)
+    vn.add_ddl("CREATE TABLE customers (id INT PRIMARY KEY, name TEXT)")
+    vn.add_ddl("CREATE TABLE orders (id INT PRIMARY KEY, customer_id INT REFERENCES customers(id))")
+    vn.add_question_sql("How many orders?", "SELECT COUNT(*) FROM orders")
+
+    training_data = vn.get_training_data()
+    assert training_data.loc[training_data["training_data_type"] == "sql", "content"].tolist() == [
+        "SELECT COUNT(*) FROM orders"
+    ]
+
+    graph = vn.get_schema_graph()
+    assert graph.find_table("orders") is not None
+    assert graph.join_paths([graph.find_table("customers"), graph.find_table("orders")])
@@ -0,0 +1,155 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("flask")
+
+from vanna.flask.cache import BoundedMemoryCache, DiskCache
+
+
+def test_bounded_memory_cache_evicts_least_recently_used():
+    df = pd.DataFrame({"n": range(1000)})
+    cache = BoundedMemoryCache(max_entries=2, max_bytes=None)
+
+    for id in ["a", "b"]:
+        cache.set(id=id, field="df", value=df)
+    cache.get(id="a", field="df")
+    cache.set(id="c", field="question", value="?")
+
+    assert cache.get(id="b", field="df") is None
+    assert cache.get(id="a", field="df") is df
+    assert cache.stats()["evictions"] == 1
+
+    cache = BoundedMemoryCache(max_entries=None, max_bytes=int(df.memory_usage(deep=True).sum() * 1.5))
+    cache.set(id="a", field="df", value=df)
+    cache.set(id="b", field="df", value=df)
+
+    assert [row["id"] for row in cache.get_all(["question"])] == ["b"]
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+    cache = BoundedMemoryCache(ttl=0)
+    cache.set(id="a", field="sql", value="SELECT 1")
+    assert cache.get(id="a", field="sql") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_disk_cache_round_trips_and_is_shared(tmp_path):
+    pytest.importorskip("pyarrow")
+
+    path = str(tmp_path / "cache.sqlite")
+    df = pd.DataFrame({"n": range(1000), "name": ["x"] * 1000})
+
+    cache = DiskCache(path=path, max_entries=2)
+    cache.set(id="a", field="df", value=df)
+    cache.set(id="a", field="question", value="How many?")
+    cache.set(id="a", field="followup_questions", value=["Why?"])
+
+    other_worker = DiskCache(path=path, max_entries=2)
+    pd.testing.assert_frame_equal(other_worker.get(id="a", field="df"), df)
+    assert other_worker.get(id="a", field="followup_questions") == ["Why?"]
+    assert other_worker.get_all(["question"]) == [{"id": "a", "question": "How many?"}]
+
+    cache.set(id="b", field="question", value="b")
+    cache.get(id="a", field="question")
+    cache.set(id="c", field="question", value="c")
+
+    assert [row["id"] for row in other_worker.get_all(["question"])] == ["a", "c"]
+    assert cache.stats()["evictions"] == 1
+
+    cache.delete(id="a")
+    assert len(other_worker) == 1
+
+    # The totals kept by the triggers match the table, and files written before them are counted when opened
+    cache.set(id="c", field="sql", value="SELECT 1")
+    cache.set(id="c", field="sql", value="SELECT 2")
+    scanned = cache.conn.execute("SELECT COUNT(DISTINCT id), SUM(size) FROM cache").fetchone()
+    assert (cache.stats()["entries"], cache.stats()["bytes"]) == scanned
+    cache.conn.execute("DROP TABLE cache_totals")
+    assert (DiskCache(path=path).stats()["entries"], DiskCache(path=path).stats()["bytes"]) == scanned
+
+
+def test_prefetch_generates_the_answer_in_parallel():
+    import threading
+    import time
+
+    from vanna.base import VannaBase
+    from vanna.flask import VannaFlaskAPI
+    from vanna.mock import MockEmbedding, MockLLM, MockVectorDB
+
+    class SlowVanna(MockEmbedding, MockVectorDB, MockLLM):
+        def __init__(self):
+            VannaBase.__init__(self, config={})
+            self.calls = []
+            self.lock = threading.Lock()
+            self.run_sql_is_set = True
+
+        def slow_call(self, name, result):
+            with self.lock:
+                self.calls.append(name)
+            time.sleep(0.3)
+            return result
+
+        def run_sql(self, sql, **kwargs):
+            return pd.DataFrame({"region": ["a", "b"], "product": ["x", "y"], "sales": [1, 2]})
+
+        def generate_plotly_code(self, question=None, sql=None, df_metadata=None, **kwargs):
+            return self.slow_call("plotly_code", "fig = px.bar(df, x='region', y='sales', color='product')")
+
+        def generate_summary(self, question, df, **kwargs):
+            return self.slow_call("summary", "Sales are up.")
+
+        def generate_followup_questions(self, question, sql, df, n_questions=5, **kwargs):
+            return self.slow_call("followup_questions", ["By month?"])
+
+    vn = SlowVanna()
+    api = VannaFlaskAPI(vn, debug=False, allow_llm_to_see_data=True, prefetch=True)
+    client = api.flask_app.test_client()
+    api.cache.set(id="1", field="question", value="What are the sales?")
+    api.cache.set(id="1", field="sql", value="SELECT 1")
+
+    start = time.perf_counter()
+    assert client.get("/api/v0/run_sql?id=1").get_json()["type"] == "df"
+    assert client.get("/api/v0/generate_plotly_figure?id=1").get_json()["type"] == "plotly_figure"
+    assert client.get("/api/v0/generate_summary?id=1").get_json()["text"] == "Sales are up."
+    assert client.get("/api/v0/generate_followup_questions?id=1").get_json()["questions"] == ["By month?"]
+    # The three LLM calls overlap
+    assert time.perf_counter() - start < 0.8
+
+    body = client.get("/api/v0/generate_answer_stream?id=1").get_data(as_text=True)
+    assert body.count("data: ") == 3
+    assert sorted(vn.calls) == ["followup_questions", "plotly_code", "summary"]
+
+    # Nothing is left of the query once its answer is computed
+    deadline = time.perf_counter() + 5
+    while (api._answers or api._generations) and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    assert api._answers == {} and api._generations == {}
+
+    # Closing the API stops its answer threads
+    api.close()
+    with pytest.raises(RuntimeError):
+        api._answer_executor.submit(print)
+
+
+def test_metrics_require_login_unless_public():
+    from vanna.base import VannaBase
+    from vanna.base.tracing import MetricsTracer
+    from vanna.flask import VannaFlaskAPI
+    from vanna.flask.auth import NoAuth
+    from vanna.mock import MockEmbedding, MockLLM, MockVectorDB
+
+    class MockVanna(MockEmbedding, MockVectorDB, MockLLM):
+        def __init__(self, config=None):
+            VannaBase.__init__(self, config=config)
+
+    class LoggedOut(NoAuth):
+        def is_logged_in(self, user) -> bool:
+            return False
+
+    vn = MockVanna(config={"tracer": MetricsTracer()})
+
+    client = VannaFlaskAPI(vn, auth=LoggedOut(), debug=False).flask_app.test_client()
+    assert client.get("/api/v0/metrics").get_json()["type"] == "not_logged_in"
+
+    client = VannaFlaskAPI(vn, auth=LoggedOut(), debug=False, public_metrics=True).flask_app.test_client()
+    response = client.get("/api/v0/metrics")
+    assert response.status_code == 200 and response.mimetype == "text/plain"